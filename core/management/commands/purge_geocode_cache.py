@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.services import geocode
+
+
+class Command(BaseCommand):
+    help = "Delete geocode cache entries older than GEOCODE_CACHE_TTL_DAYS."
+
+    def handle(self, *args, **options):
+        deleted = geocode.purge_expired()
+        self.stdout.write(f"Deleted {deleted} expired geocode entries.")
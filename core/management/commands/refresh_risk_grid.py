@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services import risk_grid
+
+
+class Command(BaseCommand):
+    help = "Compute blackout risk for every county and write the national risk snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--centroids",
+            help="Census Gazetteer county file or fips,lat,lon CSV. Defaults to the county boundary file.",
+        )
+        parser.add_argument("--concurrency", type=int, default=4, help="Parallel upstream requests.")
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Re-run every N seconds instead of exiting after one refresh.",
+        )
+
+    def handle(self, *args, **options):
+        centroids = risk_grid.load_centroids(options["centroids"])
+        if not centroids:
+            raise CommandError(
+                "No county centroids available. Pass --centroids or add data/county_boundaries.geojson."
+            )
+
+        while True:
+            started = time.monotonic()
+            df = risk_grid.compute_national_risk(centroids, concurrency=max(options["concurrency"], 1))
+            if df.empty:
+                raise CommandError("No counties to score; check data/county_risk.csv.")
+            risk_grid.write_snapshot(df)
+            self.stdout.write(
+                f"Scored {len(df)} counties in {time.monotonic() - started:.1f}s -> {risk_grid.SNAPSHOT_PATH}"
+            )
+            if options["interval"] <= 0:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,57 @@
+import argparse
+import glob
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.services import ml_risk
+
+
+# Roughly a decade of recent Storm Events detail rows.
+DECADE_ROWS = 600_000
+
+
+def _damage_values(rows):
+    # The cache stores parsed damage, so read the raw strings from the CSVs.
+    paths = sorted(glob.glob(ml_risk.STORM_GLOB))
+    if not paths:
+        raise SystemExit("No storm event data found.")
+    df = pd.concat([ml_risk._read_storm_file(path) for path in paths], ignore_index=True)
+    values = pd.concat([df["DAMAGE_PROPERTY"], df["DAMAGE_CROPS"]], ignore_index=True)
+    # Tile the available years up to the requested size so the benchmark
+    # runs at decade scale even with only a few years on disk.
+    repeats = -(-rows // len(values))
+    return pd.concat([values] * repeats, ignore_index=True).iloc[:rows]
+
+
+def _best_of(fn, values, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(values)
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the row-wise and vectorized damage parsers.")
+    parser.add_argument("--rows", type=int, default=DECADE_ROWS, help="Damage values to parse.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per parser; the best time is reported.")
+    args = parser.parse_args()
+
+    values = _damage_values(args.rows)
+    rowwise, rowwise_s = _best_of(lambda series: series.apply(ml_risk._parse_damage), values, args.repeat)
+    vectorized, vectorized_s = _best_of(ml_risk._parse_damage_series, values, args.repeat)
+
+    expected = rowwise.to_numpy(dtype=float)
+    actual = vectorized.to_numpy(dtype=float)
+    identical = bool(np.all((expected == actual) | (np.isnan(expected) & np.isnan(actual))))
+    print(f"{len(values):,} damage values")
+    print(f"row-wise apply   {rowwise_s:8.3f}s")
+    print(f"vectorized       {vectorized_s:8.3f}s  ({rowwise_s / vectorized_s:.1f}x)")
+    print(f"identical output {identical}")
+
+
+if __name__ == "__main__":
+    main()
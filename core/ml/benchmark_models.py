@@ -0,0 +1,115 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, r2_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from core.services import anomaly, ml_risk, model_factory
+
+
+SAMPLE_INVERTER_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "Anomaly_Data.csv")
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _print_row(name, backend, fit_s, predict_s, scores):
+    score_text = "  ".join(f"{key}={value:.4f}" for key, value in scores.items())
+    print(f"{name:<24} {backend:<6} fit={fit_s:8.2f}s  predict={predict_s:7.3f}s  {score_text}")
+
+
+def benchmark_storm_events(rows=None):
+    df = ml_risk._load_storm_events()
+    if df.empty:
+        print("No storm event data found; skipping classifier benchmark.")
+        return
+    if rows and rows < len(df):
+        df = df.sample(rows, random_state=42)
+    X, y, _ = ml_risk._prepare_training_data(df)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    print(f"Storm Events classifier: {len(X_train):,} train / {len(X_test):,} test rows, {X.shape[1]} features")
+    for backend in model_factory.BACKENDS:
+        model = model_factory.make_classifier(backend, {"random_state": 42})
+        _, fit_s = _timed(model.fit, X_train, y_train)
+        probas, predict_s = _timed(model.predict_proba, X_test)
+        probas = probas[:, 1]
+        scores = {
+            "auc": roc_auc_score(y_test, probas),
+            "accuracy": accuracy_score(y_test, (probas >= 0.5).astype(int)),
+        }
+        _print_row("outage_classifier", backend, fit_s, predict_s, scores)
+
+
+def synthetic_inverter_data(rows, seed=42):
+    # One inverter at 15-minute resolution: a clipped daily solar curve with
+    # day-to-day cloud cover and sensor noise.
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2024-01-01", periods=rows, freq="15min")
+    hours = timestamps.hour + timestamps.minute / 60
+    curve = np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None)
+    cloud = rng.uniform(0.5, 1.0, rows // 96 + 1)[np.arange(rows) // 96]
+    ac_power = np.clip(curve * cloud * 100 + rng.normal(0, 2, rows), 0, None)
+    raw = pd.DataFrame({
+        "DATE_TIME": timestamps,
+        "SOURCE_KEY": "synthetic",
+        "AC_POWER": ac_power,
+        "DC_POWER": ac_power * 10.5,
+    })
+    return anomaly.preprocess_inverter_data(raw)
+
+
+def benchmark_inverter(path=None, synthetic_rows=None):
+    if synthetic_rows:
+        df = synthetic_inverter_data(synthetic_rows)
+    elif not os.path.exists(path):
+        print(f"No inverter data at {path}; skipping forecast benchmark (use --synthetic N).")
+        return
+    else:
+        with open(path, "rb") as handle:
+            df = anomaly.load_inverter_csv_stream(handle)
+    df = df.dropna(subset=["TIME_STAMP", "AC_POWER_FIXED"])
+    if len(df) < 50:
+        print("Not enough inverter rows for the forecast benchmark.")
+        return
+    X = anomaly.build_forecast_features(df)
+    y = df["AC_POWER_FIXED"]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, shuffle=False
+    )
+    print(f"Inverter forecast: {len(X_train):,} train / {len(X_test):,} test rows")
+    for model_type in ("gradient_boosting", "random_forest"):
+        for backend in model_factory.BACKENDS:
+            model = model_factory.make_regressor(
+                model_type, backend, model_factory.FORECAST_MODEL_PARAMS[model_type]
+            )
+            _, fit_s = _timed(model.fit, X_train, y_train)
+            predictions, predict_s = _timed(model.predict, X_test)
+            scores = {
+                "r2": r2_score(y_test, predictions),
+                "mae": float(np.mean(np.abs(y_test.to_numpy() - predictions))),
+            }
+            _print_row(model_type, backend, fit_s, predict_s, scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare exact and histogram model backends.")
+    parser.add_argument("--rows", type=int, help="Sample this many Storm Events rows.")
+    parser.add_argument("--inverter-csv", default=SAMPLE_INVERTER_CSV, help="Inverter CSV for the forecast benchmark.")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Benchmark the forecast on N generated inverter rows instead.")
+    args = parser.parse_args()
+
+    benchmark_storm_events(args.rows)
+    print()
+    benchmark_inverter(args.inverter_csv, synthetic_rows=args.synthetic)
+
+
+if __name__ == "__main__":
+    main()
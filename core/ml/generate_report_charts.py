@@ -377,7 +377,7 @@ def main():
     df_eval["prob"] = probas
     df_eval["actual"] = y_test.values
     event_perf = (
-        df_eval.groupby("EVENT_TYPE")
+        df_eval.groupby("EVENT_TYPE", observed=True)
         .agg(count=("actual", "size"), actual_rate=("actual", "mean"), pred_rate=("prob", "mean"))
         .reset_index()
         .sort_values("count", ascending=False)
@@ -0,0 +1,15 @@
+from core.services import ml_risk
+
+
+def main():
+    result = ml_risk.ingest_storm_events()
+    if not result["files"]:
+        print("No storm event data found.")
+        return
+    print(f"{len(result['files'])} Storm Events files cached; parsed {len(result['parsed'])}.")
+    for name in result["parsed"]:
+        print(f"  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
-from core.services import ml_risk
+import argparse
+
+from core.services import ml_risk, model_factory
 
 
 def main():
-    model = ml_risk.train_and_cache_model()
+    parser = argparse.ArgumentParser(description="Train the outage risk model and cache county risk.")
+    parser.add_argument("--backend", choices=model_factory.BACKENDS, help="Model backend (default: MODEL_BACKEND or exact).")
+    args = parser.parse_args()
+
+    model = ml_risk.train_and_cache_model(backend=args.backend)
     if model:
         print("Model trained and county risk cached.")
     else:
@@ -0,0 +1,15 @@
+from core.services import ml_risk
+
+
+def main():
+    result = ml_risk.update_county_risk()
+    if result is None:
+        print("No trained model; run python -m core.ml.train_risk_model first.")
+    elif not result["scored_files"]:
+        print("County risk is up to date.")
+    else:
+        print(f"Scored {result['events']:,} events from {len(result['scored_files'])} new files; county risk updated.")
+
+
+if __name__ == "__main__":
+    main()
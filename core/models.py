@@ -1,3 +1,13 @@
 from django.db import models
 
-# Create your models here.
+
+class GeocodeCacheEntry(models.Model):
+    query = models.CharField(max_length=255, unique=True)
+    results = models.JSONField(default=list)
+    fetched_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['query']
+
+    def __str__(self):
+        return self.query
@@ -1,5 +1,6 @@
 import os
-import requests
+
+from . import http_client
 
 try:
     from dotenv import load_dotenv
@@ -51,14 +52,14 @@ def ask_county_summary(county_payload):
         "reasoning": {"effort": "low"},
     }
 
-    response = requests.post(
+    response = http_client.post(
+        "azure_openai",
         endpoint,
         headers={
             "Content-Type": "application/json",
             "api-key": api_key,
         },
         json=payload,
-        timeout=30,
     )
     if response.status_code >= 400:
         raise ValueError(f"Azure OpenAI error {response.status_code}: {response.text}")
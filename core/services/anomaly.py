@@ -1,4 +1,6 @@
+import hashlib
 import io
+import threading
 
 import numpy as np
 import pandas as pd
@@ -6,9 +8,32 @@ from sklearn.ensemble import IsolationForest
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
+from . import model_factory
+
 
 DEFAULT_CONTAMINATION = 0.02
 MIN_DATA_ROWS = 25
+CSV_CHUNK_ROWS = 200_000
+STREAM_KEEP_COLUMNS = ["TIME_STAMP", "Value", "AC_POWER_FIXED", "EFFICIENCY_%", "SOURCE_ID"]
+FORECAST_FEATURE_COLUMNS = [
+    "time_index",
+    "hour",
+    "day_of_week",
+    "month",
+    "day_of_year",
+    "is_weekend",
+    "rolling_mean_3",
+    "rolling_std_3",
+    "rolling_mean_7",
+    "lag_1",
+    "lag_2",
+]
+FEATURE_CACHE_SIZE = 4
+# Longest rolling window minus one: appended rows never look further back.
+FEATURE_LOOKBACK = 6
+
+_feature_lock = threading.Lock()
+_feature_cache = {}
 
 
 def _normalize_columns(df):
@@ -44,6 +69,69 @@ def load_inverter_csv(file_bytes):
     return preprocess_inverter_data(df)
 
 
+def _stream_columns(handle):
+    header = pd.read_csv(handle, nrows=0)
+    handle.seek(0)
+    col_map = _map_columns(header)
+    timestamp_col = col_map.get("timestamp") or ("TIME_STAMP" if "TIME_STAMP" in header.columns else None)
+    if not timestamp_col:
+        return None, None
+
+    numeric_cols = [
+        col_map[key]
+        for key in ("ac_power", "dc_power", "energy", "value", "efficiency")
+        if col_map.get(key)
+    ]
+    if not any(col_map.get(key) for key in ("ac_power", "dc_power", "energy", "value")):
+        # Same fallback as preprocess_inverter_data: first numeric column,
+        # inferred from a sample instead of the whole file.
+        sample = pd.read_csv(handle, nrows=1000)
+        handle.seek(0)
+        numeric = sample.select_dtypes(include=[np.number]).columns.tolist()
+        if not numeric:
+            return None, None
+        numeric_cols.insert(0, numeric[0])
+
+    dtypes = {timestamp_col: str}
+    if col_map.get("source"):
+        dtypes[col_map["source"]] = str
+    for col in numeric_cols:
+        dtypes.setdefault(col, "float64")
+    return list(dict.fromkeys([timestamp_col, *numeric_cols, *dtypes])), dtypes
+
+
+def _read_chunks(handle, usecols, dtypes, chunksize):
+    for chunk in pd.read_csv(handle, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+        processed = preprocess_inverter_data(chunk)
+        if not processed.empty:
+            yield processed[STREAM_KEEP_COLUMNS]
+
+
+def load_inverter_csv_stream(handle, chunksize=CSV_CHUNK_ROWS):
+    # Parse only the mapped columns, a chunk at a time, so peak memory is one
+    # raw chunk plus the compact processed columns rather than the whole file.
+    usecols, dtypes = _stream_columns(handle)
+    if usecols is None:
+        return pd.DataFrame()
+    try:
+        chunks = list(_read_chunks(handle, usecols, dtypes, chunksize))
+    except ValueError:
+        # A value column holds non-numeric junk; re-read it as text and let
+        # preprocess_inverter_data coerce it.
+        handle.seek(0)
+        dtypes = {col: str for col in dtypes}
+        chunks = list(_read_chunks(handle, usecols, dtypes, chunksize))
+    if not chunks:
+        return pd.DataFrame()
+
+    df = pd.concat(chunks, ignore_index=True)
+    df = df.sort_values("TIME_STAMP", kind="stable").reset_index(drop=True)
+    df["time_index"] = range(len(df))
+    df["SOURCE_ID_NUMBER"] = pd.factorize(df["SOURCE_ID"])[0] + 1
+    df["SOURCE_ID"] = df["SOURCE_ID"].astype("category")
+    return df
+
+
 def load_inverter_json(payload):
     df = pd.DataFrame(payload)
     return preprocess_inverter_data(df)
@@ -106,23 +194,18 @@ def preprocess_inverter_data(df):
     return df
 
 
-def detect_anomalies(df, contamination=DEFAULT_CONTAMINATION):
-    df = df.copy()
-    if len(df) < MIN_DATA_ROWS:
-        df["anomaly"] = False
-        df["anomaly_score"] = 0.0
-        return df
-
+def build_anomaly_features(df):
     features = df[["Value"]].copy()
     if "TIME_STAMP" in df.columns:
-        df["hour"] = pd.to_datetime(df["TIME_STAMP"]).dt.hour
-        df["day_of_week"] = pd.to_datetime(df["TIME_STAMP"]).dt.dayofweek
-        features["hour_normalized"] = df["hour"] / 24
-        features["day_normalized"] = df["day_of_week"] / 7
+        timestamps = pd.to_datetime(df["TIME_STAMP"])
+        features["hour_normalized"] = timestamps.dt.hour / 24
+        features["day_normalized"] = timestamps.dt.dayofweek / 7
+    return features
+
 
+def fit_anomaly_model(features, contamination=DEFAULT_CONTAMINATION):
     scaler = StandardScaler()
     features_scaled = scaler.fit_transform(features)
-
     model = IsolationForest(
         contamination=contamination,
         random_state=42,
@@ -130,12 +213,97 @@ def detect_anomalies(df, contamination=DEFAULT_CONTAMINATION):
         max_samples="auto",
         max_features=1.0,
     )
-    df["anomaly"] = model.fit_predict(features_scaled) == -1
+    model.fit(features_scaled)
+    return scaler, model
+
+
+def detect_anomalies(df, contamination=DEFAULT_CONTAMINATION):
+    df = df.copy()
+    if len(df) < MIN_DATA_ROWS:
+        df["anomaly"] = False
+        df["anomaly_score"] = 0.0
+        return df
+
+    if "TIME_STAMP" in df.columns:
+        df["hour"] = pd.to_datetime(df["TIME_STAMP"]).dt.hour
+        df["day_of_week"] = pd.to_datetime(df["TIME_STAMP"]).dt.dayofweek
+    features = build_anomaly_features(df)
+
+    scaler, model = fit_anomaly_model(features, contamination)
+    features_scaled = scaler.transform(features)
+    df["anomaly"] = model.predict(features_scaled) == -1
     df["anomaly_score"] = model.score_samples(features_scaled)
     return df
 
 
-def run_forecast(df, model_type="gradient_boosting"):
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df[["TIME_STAMP", "AC_POWER_FIXED"]], index=False).to_numpy()
+
+
+def _digest(row_hashes):
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+
+def _raw_forecast_features(df, start, skip=0):
+    timestamps = df["TIME_STAMP"]
+    power = df["AC_POWER_FIXED"]
+    features = pd.DataFrame({
+        "time_index": np.arange(start, start + len(df)),
+        "hour": timestamps.dt.hour.to_numpy(),
+        "day_of_week": timestamps.dt.dayofweek.to_numpy(),
+        "month": timestamps.dt.month.to_numpy(),
+        "day_of_year": timestamps.dt.dayofyear.to_numpy(),
+        "rolling_mean_3": power.rolling(window=3, min_periods=1).mean().to_numpy(),
+        "rolling_std_3": power.rolling(window=3, min_periods=1).std().fillna(0).to_numpy(),
+        "rolling_mean_7": power.rolling(window=7, min_periods=1).mean().to_numpy(),
+        # Lags at the very start are left missing and filled with the
+        # dataset mean at read time, since that mean moves as rows arrive.
+        "lag_1": power.shift(1).to_numpy(),
+        "lag_2": power.shift(2).to_numpy(),
+    })
+    features.insert(5, "is_weekend", (features["day_of_week"] >= 5).astype(int))
+    return features.iloc[skip:].reset_index(drop=True)
+
+
+def _find_prefix_entry(row_hashes):
+    candidates = [entry for entry in _feature_cache.values() if entry["rows"] < len(row_hashes)]
+    for entry in sorted(candidates, key=lambda entry: entry["rows"], reverse=True):
+        if _digest(row_hashes[:entry["rows"]]) == entry["key"]:
+            return entry
+    return None
+
+
+def build_forecast_features(df):
+    # Features depend only on timestamps and power, so they are cached by a
+    # hash of those columns and shared by every model type. When the data is
+    # a cached dataset plus appended rows, only the new rows are computed.
+    row_hashes = _row_hashes(df)
+    key = _digest(row_hashes)
+    with _feature_lock:
+        entry = _feature_cache.get(key)
+        base = _find_prefix_entry(row_hashes) if entry is None else None
+
+    if entry is None:
+        if base is None:
+            raw = _raw_forecast_features(df, 0)
+        else:
+            start = max(base["rows"] - FEATURE_LOOKBACK, 0)
+            new_rows = _raw_forecast_features(df.iloc[start:], start, skip=base["rows"] - start)
+            raw = pd.concat([base["raw"], new_rows], ignore_index=True)
+        entry = {"key": key, "rows": len(df), "raw": raw}
+        with _feature_lock:
+            _feature_cache[key] = entry
+            while len(_feature_cache) > FEATURE_CACHE_SIZE:
+                _feature_cache.pop(next(iter(_feature_cache)))
+
+    features = entry["raw"].copy()
+    power_mean = df["AC_POWER_FIXED"].mean()
+    features["lag_1"] = features["lag_1"].fillna(power_mean)
+    features["lag_2"] = features["lag_2"].fillna(power_mean)
+    return features.fillna(0).set_axis(df.index)
+
+
+def run_forecast(df, model_type="gradient_boosting", backend=None):
     df = df.copy()
     df["TIME_STAMP"] = pd.to_datetime(df["TIME_STAMP"], errors="coerce")
     df = df.dropna(subset=["TIME_STAMP", "AC_POWER_FIXED"])
@@ -143,54 +311,19 @@ def run_forecast(df, model_type="gradient_boosting"):
     if len(df) < 50:
         return pd.DataFrame(), {}, "Need at least 50 data points for forecasting"
 
-    df["time_index"] = range(len(df))
-    df["hour"] = df["TIME_STAMP"].dt.hour
-    df["day_of_week"] = df["TIME_STAMP"].dt.dayofweek
-    df["month"] = df["TIME_STAMP"].dt.month
-    df["day_of_year"] = df["TIME_STAMP"].dt.dayofyear
-    df["is_weekend"] = (df["day_of_week"] >= 5).astype(int)
-
-    df["rolling_mean_3"] = df["AC_POWER_FIXED"].rolling(window=3, min_periods=1).mean()
-    df["rolling_std_3"] = df["AC_POWER_FIXED"].rolling(window=3, min_periods=1).std().fillna(0)
-    df["rolling_mean_7"] = df["AC_POWER_FIXED"].rolling(window=7, min_periods=1).mean()
-
-    df["lag_1"] = df["AC_POWER_FIXED"].shift(1).fillna(df["AC_POWER_FIXED"].mean())
-    df["lag_2"] = df["AC_POWER_FIXED"].shift(2).fillna(df["AC_POWER_FIXED"].mean())
-
-    feature_cols = [
-        "time_index",
-        "hour",
-        "day_of_week",
-        "month",
-        "day_of_year",
-        "is_weekend",
-        "rolling_mean_3",
-        "rolling_std_3",
-        "rolling_mean_7",
-        "lag_1",
-        "lag_2",
-    ]
-
-    X = df[feature_cols].fillna(0)
+    X = build_forecast_features(df)
+    df = pd.concat([df.drop(columns=FORECAST_FEATURE_COLUMNS, errors="ignore"), X], axis=1)
     y = df["AC_POWER_FIXED"]
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, shuffle=False
     )
 
-    if model_type == "linear_regression":
-        from sklearn.linear_model import LinearRegression
-
-        model = LinearRegression()
-    elif model_type == "random_forest":
-        from sklearn.ensemble import RandomForestRegressor
-
-        model = RandomForestRegressor(n_estimators=200, random_state=42)
+    if model_type == "random_forest":
+        params = {"n_estimators": 200, "random_state": 42}
     else:
-        from sklearn.ensemble import GradientBoostingRegressor
-
-        model = GradientBoostingRegressor(random_state=42)
-
+        params = {"random_state": 42}
+    model = model_factory.make_regressor(model_type, backend, params)
     model.fit(X_train, y_train)
     predictions = model.predict(X_test)
 
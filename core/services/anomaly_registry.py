@@ -0,0 +1,176 @@
+import os
+import re
+import threading
+import time
+
+import joblib
+import pandas as pd
+
+from . import anomaly
+
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "anomaly_models")
+REFIT_AFTER_SECONDS = int(os.environ.get("ANOMALY_REFIT_AFTER_SECONDS", str(24 * 3600)))
+# Refits train on the site's recent history, never on a single batch, and
+# wait until that history is a real training window.
+HISTORY_ROWS = int(os.environ.get("ANOMALY_HISTORY_ROWS", "50000"))
+MIN_TRAIN_ROWS = int(os.environ.get("ANOMALY_MIN_TRAIN_ROWS", "1000"))
+# Drift compares recent Values with the training data's per-hour baseline,
+# so the daily solar curve is not mistaken for drift. Refit when the
+# recent window moves this many per-hour standard deviations.
+DRIFT_WINDOW_ROWS = int(os.environ.get("ANOMALY_DRIFT_WINDOW_ROWS", "1000"))
+DRIFT_THRESHOLD = float(os.environ.get("ANOMALY_DRIFT_THRESHOLD", "1.0"))
+
+_models = {}
+_history = {}
+_recent = {}
+_registry_lock = threading.Lock()
+_site_locks = {}
+
+
+def _model_path(site, suffix=""):
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", str(site))[:100] or "default"
+    return os.path.join(MODEL_DIR, f"{safe}{suffix}.joblib")
+
+
+def _history_path(site):
+    return _model_path(site, ".history")
+
+
+def _dump(value, path):
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(value, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _site_lock(site):
+    with _registry_lock:
+        return _site_locks.setdefault(site, threading.Lock())
+
+
+def load_model(site):
+    entry = _models.get(site)
+    if entry is not None:
+        return entry
+    path = _model_path(site)
+    if os.path.exists(path):
+        entry = joblib.load(path)
+        _models[site] = entry
+    return entry
+
+
+def save_model(site, entry):
+    _dump(entry, _model_path(site))
+    _models[site] = entry
+
+
+def _append_history(site, features):
+    history = _history.get(site)
+    if history is None and os.path.exists(_history_path(site)):
+        history = joblib.load(_history_path(site))
+    if history is None or list(history.columns) != list(features.columns):
+        history = features
+    else:
+        history = pd.concat([history, features], ignore_index=True)
+    history = history.tail(HISTORY_ROWS).reset_index(drop=True)
+    _history[site] = history
+    return history
+
+
+def _hours(features):
+    if "hour_normalized" not in features.columns:
+        return pd.Series(0, index=features.index)
+    return (features["hour_normalized"] * 24).round().astype(int)
+
+
+def _drift(entry, site):
+    recent = _recent.get(site)
+    if recent is None or len(recent) < DRIFT_WINDOW_ROWS:
+        return 0.0
+    hours = _hours(recent)
+    expected = hours.map(entry["hour_mean"])
+    known = expected.notna()
+    spread = float(hours[known].map(entry["hour_std"]).sum())
+    if not spread:
+        return 0.0
+    return abs(float((recent["Value"][known] - expected[known]).sum())) / spread
+
+
+def _refit_reason(entry, site, features, contamination):
+    if entry is None:
+        return "new"
+    if entry["columns"] != list(features.columns) or "hour_mean" not in entry:
+        return "schema"
+    if entry["contamination"] != contamination:
+        return "contamination"
+    if time.time() - entry["fitted_at"] > REFIT_AFTER_SECONDS:
+        return "schedule"
+    if _drift(entry, site) > DRIFT_THRESHOLD:
+        return "drift"
+    return None
+
+
+def fit_site_model(site, features, contamination=anomaly.DEFAULT_CONTAMINATION):
+    scaler, model = anomaly.fit_anomaly_model(features, contamination)
+    by_hour = features["Value"].groupby(_hours(features))
+    entry = {
+        "scaler": scaler,
+        "model": model,
+        "columns": list(features.columns),
+        "contamination": contamination,
+        "fitted_at": time.time(),
+        "train_rows": int(len(features)),
+        "hour_mean": by_hour.mean().to_dict(),
+        "hour_std": by_hour.std(ddof=0).to_dict(),
+    }
+    save_model(site, entry)
+    _dump(features, _history_path(site))
+    _recent.pop(site, None)
+    return entry
+
+
+def score_for_site(df, site, contamination=anomaly.DEFAULT_CONTAMINATION):
+    df = df.copy()
+    features = anomaly.build_anomaly_features(df)
+
+    with _site_lock(site):
+        history = _append_history(site, features)
+        recent = _recent.get(site)
+        recent = features if recent is None else pd.concat([recent, features], ignore_index=True)
+        _recent[site] = recent.tail(DRIFT_WINDOW_ROWS)
+        entry = load_model(site)
+        reason = _refit_reason(entry, site, features, contamination)
+        if reason is not None and len(history) >= MIN_TRAIN_ROWS:
+            entry = fit_site_model(site, history, contamination)
+        else:
+            reason = None
+
+    if entry is None or not set(entry["columns"]).issubset(features.columns):
+        # Until the history is large enough for a site model, fit on the
+        # batch itself as the endpoint does without a site.
+        scored = anomaly.detect_anomalies(df, contamination=contamination)
+        return scored, {
+            "site": site,
+            "status": "bootstrap",
+            "refit": None,
+            "fitted_at": None,
+            "history_rows": int(len(history)),
+        }
+
+    features_scaled = entry["scaler"].transform(features[entry["columns"]])
+    df["anomaly"] = entry["model"].predict(features_scaled) == -1
+    df["anomaly_score"] = entry["model"].score_samples(features_scaled)
+    return df, {
+        "site": site,
+        "status": "site",
+        "refit": reason,
+        "fitted_at": entry["fitted_at"],
+        "history_rows": int(len(history)),
+    }
+
+
+def clear_cache():
+    _models.clear()
+    _history.clear()
+    _recent.clear()
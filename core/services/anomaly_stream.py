@@ -0,0 +1,108 @@
+import math
+import os
+import threading
+from collections import deque
+
+import pandas as pd
+from django.core.cache import cache
+
+from . import anomaly, anomaly_registry
+
+
+# One day of 15-minute readings.
+WINDOW_SIZE = int(os.environ.get("ANOMALY_STREAM_WINDOW", "96"))
+MIN_WINDOW = 12
+Z_THRESHOLD = float(os.environ.get("ANOMALY_STREAM_Z_THRESHOLD", "4.0"))
+STATE_TTL = 7 * 24 * 3600
+STATE_PREFIX = "anomaly_stream"
+
+_state_locks = [threading.Lock() for _ in range(64)]
+
+
+def _state_key(site, source):
+    return f"{STATE_PREFIX}:{site}:{source}"
+
+
+def _empty_state():
+    return {"window": [], "last_ts": None, "count": 0}
+
+
+def _score_source(state, points):
+    # Running sum and sum of squares over a fixed-size window make each new
+    # point O(1), so a batch costs O(batch) regardless of history length.
+    # The sums are rebuilt from the stored window each batch so float error
+    # cannot accumulate across batches.
+    window = deque(state["window"], maxlen=WINDOW_SIZE)
+    total = sum(window)
+    total_sq = sum(value * value for value in window)
+    last_ts = pd.Timestamp(state["last_ts"]) if state["last_ts"] else None
+    keep = []
+    zscores = []
+
+    for ts, value in zip(points["TIME_STAMP"], points["Value"]):
+        if last_ts is not None and ts <= last_ts:
+            keep.append(False)
+            zscores.append(None)
+            continue
+        z = None
+        n = len(window)
+        if n >= MIN_WINDOW:
+            mean = total / n
+            variance = max(total_sq / n - mean * mean, 0.0)
+            std = math.sqrt(variance)
+            z = abs(value - mean) / std if std > 0 else 0.0
+        if len(window) == WINDOW_SIZE:
+            dropped = window[0]
+            total -= dropped
+            total_sq -= dropped * dropped
+        window.append(float(value))
+        total += value
+        total_sq += value * value
+        last_ts = ts
+        keep.append(True)
+        zscores.append(z)
+
+    new_state = {
+        "window": list(window),
+        "last_ts": last_ts.isoformat() if last_ts is not None else None,
+        "count": state["count"] + sum(keep),
+    }
+    return new_state, keep, zscores
+
+
+def score_stream(site, records, reset=False):
+    df = anomaly.load_inverter_json(records)
+    if df.empty:
+        return df
+
+    scored = []
+    for source, points in df.groupby("SOURCE_ID", sort=False):
+        key = _state_key(site, source)
+        with _state_locks[hash(key) % len(_state_locks)]:
+            # A reset starts the source's window over, e.g. after a gap or
+            # an inverter swap.
+            state = None if reset else cache.get(key)
+            state = state or _empty_state()
+            new_state, keep, zscores = _score_source(state, points)
+            cache.set(key, new_state, STATE_TTL)
+        points = points.assign(zscore=zscores)[keep]
+        scored.append(points)
+
+    df = pd.concat(scored).sort_values("TIME_STAMP", kind="stable")
+    df["window_anomaly"] = pd.to_numeric(df["zscore"]).fillna(0) > Z_THRESHOLD
+    df["anomaly_score"] = None
+
+    # Score against the site's cached forest without refitting; refits
+    # happen on the batch endpoint.
+    entry = anomaly_registry.load_model(site)
+    features = anomaly.build_anomaly_features(df)
+    if entry is not None and not df.empty and set(entry["columns"]).issubset(features.columns):
+        features_scaled = entry["scaler"].transform(features[entry["columns"]])
+        df["model_anomaly"] = entry["model"].predict(features_scaled) == -1
+        df["anomaly_score"] = entry["model"].score_samples(features_scaled)
+    else:
+        df["model_anomaly"] = False
+
+    df["anomaly"] = df["window_anomaly"] | df["model_anomaly"]
+    return df
+
@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+import json
+import threading
+
+from . import ml_risk, risk_grid
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+NATION_KEY = ""
+LAYOUTS = ("records", "columnar")
+MAX_VARIANTS = 512
+
+_payload_lock = threading.Lock()
+_payloads = {"version": None, "by_key": {}, "empty": None, "fields": [], "variants": {}}
+
+
+def _encode(counties, records=None, layout="records"):
+    document = {"counties": counties}
+    if layout != "records":
+        document["layout"] = layout
+    body = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    return {
+        "records": counties if records is None else records,
+        "body": body,
+        "etag": '"' + hashlib.md5(body).hexdigest() + '"',
+        "gzip": gzip.compress(body, compresslevel=6),
+        "br": brotli.compress(body, quality=5) if brotli else None,
+    }
+
+
+def _records(df):
+    # NaN is not valid JSON; emit null instead.
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def _build_payloads():
+    df = ml_risk.get_county_risk()
+    by_key = {}
+    if df.empty:
+        return by_key
+
+    snapshot = risk_grid.load_snapshot()
+    if snapshot is not None:
+        df = df.assign(live_risk=df["fips"].map(snapshot["index"]))
+
+    records = _records(df)
+    by_key[NATION_KEY] = _encode(records)
+    group_col = next((col for col in ("state_abbr", "state_name", "STATE") if col in df.columns), None)
+    if group_col is None:
+        return by_key
+
+    groups = {}
+    for record in records:
+        if record.get(group_col) is not None:
+            groups.setdefault(record[group_col], []).append(record)
+    for state_records in groups.values():
+        payload = _encode(state_records)
+        # Requests may name a state by abbreviation or full name.
+        first = state_records[0]
+        for col in ("state_abbr", "state_name", "STATE"):
+            if first.get(col) is not None:
+                by_key[str(first[col]).upper()] = payload
+    return by_key
+
+
+def _project(records, fields, layout):
+    if layout == "columnar":
+        # One array per field instead of repeating every key per county.
+        return {field: [record.get(field) for record in records] for field in fields}
+    return [{field: record.get(field) for field in fields} for record in records]
+
+
+def _current_version():
+    store = ml_risk.load_county_store()
+    snapshot = risk_grid.load_snapshot()
+    return store["mtime"], snapshot["mtime"] if snapshot is not None else None
+
+
+def _refresh():
+    version = _current_version()
+    if _payloads["version"] == version:
+        return
+    with _payload_lock:
+        if _payloads["version"] != version:
+            by_key = _build_payloads()
+            nation = by_key.get(NATION_KEY)
+            _payloads["fields"] = list(nation["records"][0].keys()) if nation and nation["records"] else []
+            _payloads["by_key"] = by_key
+            _payloads["empty"] = _encode([])
+            _payloads["variants"] = {}
+            _payloads["version"] = version
+
+
+def available_fields():
+    _refresh()
+    return list(_payloads["fields"])
+
+
+def get_payload(state=None, fields=None, layout="records"):
+    _refresh()
+    key = state.strip().upper() if state else NATION_KEY
+    payload = _payloads["by_key"].get(key, _payloads["empty"])
+    if not fields and layout == "records":
+        return payload
+
+    fields = tuple(fields or _payloads["fields"])
+    variant_key = (key, fields, layout)
+    variants = _payloads["variants"]
+    variant = variants.get(variant_key)
+    if variant is None:
+        if len(variants) >= MAX_VARIANTS:
+            variants.clear()
+        records = payload["records"]
+        variant = _encode(_project(records, fields, layout), records=records, layout=layout)
+        variants[variant_key] = variant
+    return variant
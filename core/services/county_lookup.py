@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+
+BOUNDARIES_PATH = os.environ.get(
+    "COUNTY_BOUNDARIES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "county_boundaries.geojson"),
+)
+GRID_DEGREES = 0.5
+
+_index_lock = threading.Lock()
+_index = {"mtime": None, "counties": None}
+
+
+def _feature_fips(feature):
+    props = feature.get("properties") or {}
+    for key in ("GEOID", "FIPS", "fips"):
+        if props.get(key):
+            return str(props[key]).zfill(5)
+    if props.get("STATEFP") and props.get("COUNTYFP"):
+        return str(props["STATEFP"]).zfill(2) + str(props["COUNTYFP"]).zfill(3)
+    if props.get("GEO_ID"):
+        return str(props["GEO_ID"])[-5:]
+    if feature.get("id"):
+        return str(feature["id"]).zfill(5)
+    return None
+
+
+def _feature_rings(geometry):
+    if not geometry:
+        return []
+    if geometry["type"] == "Polygon":
+        return geometry["coordinates"]
+    if geometry["type"] == "MultiPolygon":
+        return [ring for polygon in geometry["coordinates"] for ring in polygon]
+    return []
+
+
+def _build_county(fips, rings):
+    # Edges from every ring (outer, holes, and other parts) go into one
+    # array; the even-odd crossing rule handles holes and multipolygons.
+    x1, y1, x2, y2 = [], [], [], []
+    for ring in rings:
+        coords = np.asarray(ring, dtype=float)[:, :2]
+        if len(coords) < 3:
+            continue
+        x1.append(coords[:-1, 0])
+        y1.append(coords[:-1, 1])
+        x2.append(coords[1:, 0])
+        y2.append(coords[1:, 1])
+    if not x1:
+        return None
+    x1, y1, x2, y2 = (np.concatenate(part) for part in (x1, y1, x2, y2))
+    bbox = (
+        min(x1.min(), x2.min()),
+        min(y1.min(), y2.min()),
+        max(x1.max(), x2.max()),
+        max(y1.max(), y2.max()),
+    )
+    return {"fips": fips, "bbox": bbox, "edges": (x1, y1, x2, y2)}
+
+
+def _cell(lon, lat):
+    return int(np.floor((lon + 180) / GRID_DEGREES)), int(np.floor((lat + 90) / GRID_DEGREES))
+
+
+def _read_index():
+    with open(BOUNDARIES_PATH, "r") as handle:
+        collection = json.load(handle)
+
+    counties = []
+    grid = {}
+    for feature in collection.get("features", []):
+        fips = _feature_fips(feature)
+        county = _build_county(fips, _feature_rings(feature.get("geometry"))) if fips else None
+        if county is None:
+            continue
+        idx = len(counties)
+        counties.append(county)
+        min_x, min_y, max_x, max_y = county["bbox"]
+        min_cx, min_cy = _cell(min_x, min_y)
+        max_cx, max_cy = _cell(max_x, max_y)
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                grid.setdefault((cx, cy), []).append(idx)
+    return {"counties": counties, "grid": grid}
+
+
+def _load_index():
+    if not os.path.exists(BOUNDARIES_PATH):
+        return None
+    mtime = os.path.getmtime(BOUNDARIES_PATH)
+    if _index["counties"] is not None and _index["mtime"] == mtime:
+        return _index
+    with _index_lock:
+        if _index["counties"] is None or _index["mtime"] != mtime:
+            _index.update(_read_index())
+            _index["mtime"] = mtime
+    return _index
+
+
+def _points_in_county(county, lons, lats):
+    x1, y1, x2, y2 = county["edges"]
+    px = lons[:, None]
+    py = lats[:, None]
+    straddles = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+    crossings = np.count_nonzero(straddles & (px < x_cross), axis=1)
+    return crossings % 2 == 1
+
+
+def lookup_county_fips_batch(lats, lons):
+    index = _load_index()
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    results = [None] * len(lats)
+    if index is None or len(lats) == 0:
+        return results
+
+    # Group points by grid cell so each candidate polygon is tested once
+    # against all the points that could fall inside it.
+    cells = {}
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        if np.isfinite(lat) and np.isfinite(lon):
+            cells.setdefault(_cell(lon, lat), []).append(i)
+
+    counties = index["counties"]
+    for cell, members in cells.items():
+        pending = np.asarray(members)
+        for idx in index["grid"].get(cell, []):
+            if len(pending) == 0:
+                break
+            county = counties[idx]
+            min_x, min_y, max_x, max_y = county["bbox"]
+            p_lons = lons[pending]
+            p_lats = lats[pending]
+            in_bbox = (p_lons >= min_x) & (p_lons <= max_x) & (p_lats >= min_y) & (p_lats <= max_y)
+            if not in_bbox.any():
+                continue
+            candidates = pending[in_bbox]
+            inside = _points_in_county(county, lons[candidates], lats[candidates])
+            for point in candidates[inside]:
+                results[point] = county["fips"]
+            pending = np.setdiff1d(pending, candidates[inside], assume_unique=True)
+    return results
+
+
+def lookup_county_fips(lat, lon):
+    return lookup_county_fips_batch([lat], [lon])[0]
+
+
+def county_centroids():
+    index = _load_index()
+    if index is None:
+        return {}
+    # Vertex mean is close enough to the true centroid for picking a
+    # forecast grid cell.
+    return {
+        county["fips"]: (float(county["edges"][1].mean()), float(county["edges"][0].mean()))
+        for county in index["counties"]
+    }
+
+
+def is_available():
+    return _load_index() is not None
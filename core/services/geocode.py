@@ -0,0 +1,96 @@
+import os
+import re
+import threading
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import http_client
+from ..models import GeocodeCacheEntry
+
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_HEADERS = {"User-Agent": "SolixaDemo/1.0"}
+RESULT_LIMIT = 3
+GEOCODE_CACHE_TTL_DAYS = int(os.environ.get("GEOCODE_CACHE_TTL_DAYS", "30"))
+# Serve a miss from cached queries that extend it ("spring" -> "springfield il")
+# so autocomplete keystrokes don't each hit Nominatim.
+GEOCODE_PREFIX_MATCH = os.environ.get("GEOCODE_PREFIX_MATCH", "").lower() in {"1", "true", "yes"}
+PREFIX_MIN_LENGTH = 3
+# Nominatim's usage policy allows at most one request per second.
+MIN_REQUEST_INTERVAL = 1.0
+
+_rate_lock = threading.Lock()
+_last_request = [0.0]
+
+
+def normalize_query(query):
+    return re.sub(r"\s+", " ", query).strip().lower()[:255]
+
+
+def _fresh_since():
+    return timezone.now() - timedelta(days=GEOCODE_CACHE_TTL_DAYS)
+
+
+def _prefix_results(key):
+    # A range scan on the unique query index is a prefix search that SQLite
+    # can answer from the B-tree, unlike LIKE 'key%'.
+    entries = GeocodeCacheEntry.objects.filter(
+        query__gte=key,
+        query__lt=key + "\uffff",
+        fetched_at__gte=_fresh_since(),
+    )[:RESULT_LIMIT]
+    results = []
+    seen = set()
+    for entry in entries:
+        for place in entry.results:
+            place_id = place.get("place_id") or (place.get("lat"), place.get("lon"))
+            if place_id in seen:
+                continue
+            seen.add(place_id)
+            results.append(place)
+    return results[:RESULT_LIMIT]
+
+
+def _fetch_nominatim(key):
+    # Cache misses queue here so the process never exceeds the upstream limit.
+    with _rate_lock:
+        wait = MIN_REQUEST_INTERVAL - (time.monotonic() - _last_request[0])
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            response = http_client.get(
+                "nominatim",
+                NOMINATIM_URL,
+                params={"q": key, "format": "json", "limit": RESULT_LIMIT},
+                headers=NOMINATIM_HEADERS,
+            )
+        finally:
+            _last_request[0] = time.monotonic()
+    response.raise_for_status()
+    return response.json()
+
+
+def search(query):
+    key = normalize_query(query)
+    entry = GeocodeCacheEntry.objects.filter(query=key, fetched_at__gte=_fresh_since()).first()
+    if entry is not None:
+        return entry.results
+
+    if GEOCODE_PREFIX_MATCH and len(key) >= PREFIX_MIN_LENGTH:
+        results = _prefix_results(key)
+        if results:
+            return results
+
+    results = _fetch_nominatim(key)
+    GeocodeCacheEntry.objects.update_or_create(
+        query=key,
+        defaults={"results": results, "fetched_at": timezone.now()},
+    )
+    return results
+
+
+def purge_expired():
+    deleted, _ = GeocodeCacheEntry.objects.filter(fetched_at__lt=_fresh_since()).delete()
+    return deleted
@@ -0,0 +1,145 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Per-upstream settings: (connect, read) timeouts, retry budget for
+# idempotent requests, and circuit breaker thresholds.
+SERVICES = {
+    "open_meteo": {"timeout": (3.05, 15), "retries": 2},
+    "nws": {"timeout": (3.05, 15), "retries": 2},
+    "fcc": {"timeout": (3.05, 10), "retries": 2},
+    "nominatim": {"timeout": (3.05, 15), "retries": 1},
+    "azure_openai": {"timeout": (5, 30), "retries": 0},
+    "zapier": {"timeout": (3.05, 10), "retries": 1},
+}
+DEFAULT_SERVICE = {"timeout": (3.05, 15), "retries": 1}
+POOL_MAXSIZE = 16
+BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+
+_sessions = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    pass
+
+
+class _JitteredRetry(Retry):
+    def get_backoff_time(self):
+        # Full jitter keeps retries from many workers from arriving in lockstep.
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff else 0
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "half_open":
+                # Let a single trial request through; the rest keep failing
+                # fast until it succeeds or re-opens the breaker.
+                self.opened_at = time.monotonic()
+                return True
+            return state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def _service_config(service):
+    return SERVICES.get(service, DEFAULT_SERVICE)
+
+
+def get_session(service):
+    session = _sessions.get(service)
+    if session is not None:
+        return session
+    with _registry_lock:
+        if service not in _sessions:
+            retry = _JitteredRetry(
+                total=_service_config(service)["retries"],
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            # Each session keeps its own keep-alive pool per host.
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[service] = session
+        return _sessions[service]
+
+
+def get_breaker(service):
+    breaker = _breakers.get(service)
+    if breaker is not None:
+        return breaker
+    with _registry_lock:
+        return _breakers.setdefault(service, CircuitBreaker(service))
+
+
+def request(service, method, url, **kwargs):
+    breaker = get_breaker(service)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {service}; skipping {url}")
+
+    kwargs.setdefault("timeout", _service_config(service)["timeout"])
+    try:
+        response = get_session(service).request(method, url, **kwargs)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def get(service, url, **kwargs):
+    return request(service, "GET", url, **kwargs)
+
+
+def post(service, url, **kwargs):
+    return request(service, "POST", url, **kwargs)
+
+
+def get_breaker_states():
+    return {name: breaker.state for name, breaker in list(_breakers.items())}
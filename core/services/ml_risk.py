@@ -1,22 +1,94 @@
 import glob
+import hashlib
 import os
 import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.metrics import roc_auc_score, accuracy_score, roc_curve
 from sklearn.model_selection import train_test_split
 from sklearn.calibration import calibration_curve
 
+from . import model_factory
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 MODEL_PATH = os.path.join(DATA_DIR, "risk_model.pkl")
 COUNTY_RISK_PATH = os.path.join(DATA_DIR, "county_risk.csv")
 METRICS_PATH = os.path.join(DATA_DIR, "risk_model_metrics.json")
+# Per-county running sums behind county_risk.csv, so newly ingested event
+# files can be folded in without rescoring history.
+COUNTY_STATE_PATH = os.path.join(DATA_DIR, "county_risk_state.json")
+COUNTY_STATE_VERSION = 1
+COUNTY_SUM_COLUMNS = ["prob_sum", "svi_sum", "svi_count", "events"]
 STORM_GLOB = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "StormEvents_details-*.csv.gz")
 SVI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "svi_interactive_map.csv")
+STORM_CACHE_DIR = os.path.join(DATA_DIR, "storm_cache")
+STORM_MANIFEST_PATH = os.path.join(STORM_CACHE_DIR, "manifest.json")
+# Only the columns training and the report charts read. Bump
+# STORM_CACHE_VERSION whenever this schema changes.
+STORM_COLUMNS = {
+    "STATE": str,
+    "STATE_FIPS": "Int64",
+    "CZ_FIPS": "Int64",
+    "YEAR": "Int64",
+    "EVENT_TYPE": str,
+    "DAMAGE_PROPERTY": str,
+    "DAMAGE_CROPS": str,
+    "INJURIES_DIRECT": "float64",
+    "INJURIES_INDIRECT": "float64",
+    "DEATHS_DIRECT": "float64",
+    "DEATHS_INDIRECT": "float64",
+    "MAGNITUDE": "float64",
+    "BEGIN_LAT": "float64",
+    "BEGIN_LON": "float64",
+}
+STORM_CACHE_VERSION = 3
+STORM_INGEST_WORKERS = int(os.environ.get("STORM_INGEST_WORKERS", str(os.cpu_count() or 1)))
+# Schema of the cached, preprocessed frames. float32 loses nothing the
+# tree models see (sklearn trees split on float32), and int16 comfortably
+# holds per-event injury and death counts.
+STORM_SCHEMA = {
+    "STATE": "category",
+    "YEAR": "Int16",
+    "EVENT_TYPE": "category",
+    "FIPS": "category",
+    "DAMAGE_PROPERTY_NUM": "float32",
+    "DAMAGE_CROPS_NUM": "float32",
+    "INJURIES": "int16",
+    "DEATHS": "int16",
+    "MAGNITUDE": "float32",
+    "BEGIN_LAT": "float32",
+    "BEGIN_LON": "float32",
+    "IS_OUTAGE_EVENT": "int8",
+    "POWER_OUTAGE_LIKELY": "int8",
+}
+# Merging aligns these on the union of categories so the combined frame
+# never falls back to object strings.
+STORM_CATEGORICAL_COLUMNS = [col for col, dtype in STORM_SCHEMA.items() if dtype == "category"]
+TRAINING_FEATURES = [
+    "DAMAGE_PROPERTY_NUM",
+    "DAMAGE_CROPS_NUM",
+    "INJURIES",
+    "DEATHS",
+    "MAGNITUDE",
+    "BEGIN_LAT",
+    "BEGIN_LON",
+    "SVI_SCORE",
+]
+
+
+_county_store_lock = threading.Lock()
+_county_store = {"mtime": None, "df": None, "index": {}, "states": {}}
+_storm_cache_lock = threading.Lock()
 
 
 OUTAGE_EVENT_TYPES = {
@@ -57,18 +129,178 @@ def _parse_damage(value):
         return 0.0
 
 
-def _load_storm_events():
+def _parse_damage_series(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float).fillna(0.0)
+    # Damage strings repeat heavily ("0", "10K", ...), so the scalar parser
+    # runs once per distinct value; missing values factorize to -1 and
+    # become 0.
+    codes, uniques = pd.factorize(values)
+    parsed = np.array([_parse_damage(value) for value in uniques], dtype=float)
+    result = np.where(codes >= 0, parsed[codes] if len(parsed) else 0.0, 0.0)
+    return pd.Series(result, index=values.index)
+
+
+def _file_checksum(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_storm_file(path):
+    return pd.read_csv(path, usecols=list(STORM_COLUMNS), dtype=STORM_COLUMNS)
+
+
+def _preprocess_storm_file(df):
+    # Everything that only needs one year's rows happens here, once per file
+    # at ingest time, instead of over the merged national frame.
+    fips = df["STATE_FIPS"].astype(str).str.zfill(2) + df["CZ_FIPS"].astype(str).str.zfill(3)
+    damage_property = _parse_damage_series(df["DAMAGE_PROPERTY"])
+    injuries = df["INJURIES_DIRECT"].fillna(0) + df["INJURIES_INDIRECT"].fillna(0)
+    deaths = df["DEATHS_DIRECT"].fillna(0) + df["DEATHS_INDIRECT"].fillna(0)
+    is_outage_event = df["EVENT_TYPE"].isin(OUTAGE_EVENT_TYPES)
+    outage_likely = is_outage_event & ((damage_property >= 1_000_000) | (injuries > 0) | (deaths > 0))
+    return pd.DataFrame({
+        "STATE": df["STATE"],
+        "YEAR": df["YEAR"],
+        "EVENT_TYPE": df["EVENT_TYPE"],
+        "FIPS": fips,
+        "DAMAGE_PROPERTY_NUM": damage_property,
+        "DAMAGE_CROPS_NUM": _parse_damage_series(df["DAMAGE_CROPS"]),
+        "INJURIES": injuries,
+        "DEATHS": deaths,
+        "MAGNITUDE": df["MAGNITUDE"],
+        "BEGIN_LAT": df["BEGIN_LAT"],
+        "BEGIN_LON": df["BEGIN_LON"],
+        "IS_OUTAGE_EVENT": is_outage_event,
+        "POWER_OUTAGE_LIKELY": outage_likely,
+    }).astype(STORM_SCHEMA)
+
+
+def _write_storm_cache(df, cache_path):
+    tmp_path = f"{cache_path}.tmp"
+    if pyarrow is not None:
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def _read_storm_cache(cache_path):
+    if cache_path.endswith(".parquet"):
+        return pd.read_parquet(cache_path)
+    return pd.read_pickle(cache_path)
+
+
+def _load_manifest():
+    if not os.path.exists(STORM_MANIFEST_PATH):
+        return {}
+    with open(STORM_MANIFEST_PATH, "r") as handle:
+        manifest = json.load(handle)
+    if manifest.get("version") != STORM_CACHE_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+
+def _save_manifest(files):
+    tmp_path = f"{STORM_MANIFEST_PATH}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump({"version": STORM_CACHE_VERSION, "files": files}, handle, indent=2)
+    os.replace(tmp_path, STORM_MANIFEST_PATH)
+
+
+def _storm_cache_extension():
+    return ".parquet" if pyarrow is not None else ".pkl"
+
+
+def _cached_entry(path, entry):
+    # Size and mtime are a cheap first check; a touched but unchanged file
+    # still matches on checksum and is not re-parsed.
+    if not entry or not entry["cache"].endswith(_storm_cache_extension()):
+        return None
+    if not os.path.exists(os.path.join(STORM_CACHE_DIR, entry["cache"])):
+        return None
+    stat = os.stat(path)
+    if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return entry
+    if entry["checksum"] == _file_checksum(path):
+        return dict(entry, size=stat.st_size, mtime=stat.st_mtime)
+    return None
+
+
+def _ingest_storm_file(path, cache_path):
+    # Runs in a worker process: read, preprocess and cache one yearly file.
+    _write_storm_cache(_preprocess_storm_file(_read_storm_file(path)), cache_path)
+    stat = os.stat(path)
+    return {
+        "checksum": _file_checksum(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "cache": os.path.basename(cache_path),
+    }
+
+
+def _ingest_pending(pending, extension):
+    paths = list(pending.values())
+    cache_paths = [os.path.join(STORM_CACHE_DIR, name.split(".csv")[0] + extension) for name in pending]
+    workers = min(STORM_INGEST_WORKERS, len(paths))
+    if workers <= 1:
+        entries = [_ingest_storm_file(path, cache_path) for path, cache_path in zip(paths, cache_paths)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            entries = list(pool.map(_ingest_storm_file, paths, cache_paths))
+    return dict(zip(pending, entries))
+
+
+def ingest_storm_events():
+    # Convert each yearly CSV into a typed columnar cache file once; later
+    # runs only parse files that are new or whose checksum changed.
     files = sorted(glob.glob(STORM_GLOB))
+    extension = _storm_cache_extension()
+    with _storm_cache_lock:
+        os.makedirs(STORM_CACHE_DIR, exist_ok=True)
+        manifest = _load_manifest()
+        updated = {}
+        pending = {}
+        for path in files:
+            name = os.path.basename(path)
+            entry = _cached_entry(path, manifest.get(name))
+            if entry is None:
+                pending[name] = path
+            else:
+                updated[name] = entry
+        updated.update(_ingest_pending(pending, extension))
+        updated = {name: updated[name] for name in sorted(updated)}
+        parsed = list(pending)
+
+        for name, entry in manifest.items():
+            if name not in updated or updated[name]["cache"] != entry["cache"]:
+                stale = os.path.join(STORM_CACHE_DIR, entry["cache"])
+                if os.path.exists(stale):
+                    os.remove(stale)
+        if updated != manifest:
+            _save_manifest(updated)
+    return {"files": updated, "parsed": parsed}
+
+
+def _concat_storm_frames(files):
     if not files:
         return pd.DataFrame()
-
-    frames = []
-    for path in files:
-        frames.append(pd.read_csv(path))
+    frames = [_read_storm_cache(os.path.join(STORM_CACHE_DIR, files[name]["cache"])) for name in sorted(files)]
+    for col in STORM_CATEGORICAL_COLUMNS:
+        categories = sorted(set().union(*(frame[col].cat.categories for frame in frames)))
+        dtype = pd.CategoricalDtype(categories)
+        frames = [frame.assign(**{col: frame[col].astype(dtype)}) for frame in frames]
     df = pd.concat(frames, ignore_index=True)
     return df
 
 
+def _load_storm_events():
+    return _concat_storm_frames(ingest_storm_events()["files"])
+
+
 def _load_svi():
     if not os.path.exists(SVI_PATH):
         return pd.DataFrame()
@@ -77,55 +309,115 @@ def _load_svi():
     return df
 
 
+def _svi_scores(fips):
+    svi = _load_svi()
+    if svi.empty:
+        return np.zeros(len(fips), dtype=np.float32)
+    # Look SVI up once per FIPS category and broadcast through the codes
+    # rather than merging, which would materialize FIPS as strings.
+    scores = svi.set_index("FIPS")["RPL_THEMES"].astype(np.float32)
+    by_category = scores.reindex(fips.cat.categories).to_numpy()
+    return np.append(by_category, np.float32(np.nan))[fips.cat.codes.to_numpy()]
+
+
 def _prepare_training_data(df):
-    df = df.copy()
-    df["STATE_FIPS_STR"] = df["STATE_FIPS"].astype(str).str.zfill(2)
-    df["COUNTY_FIPS_STR"] = df["CZ_FIPS"].astype(str).str.zfill(3)
-    df["FIPS"] = df["STATE_FIPS_STR"] + df["COUNTY_FIPS_STR"]
+    df = df.assign(SVI_SCORE=_svi_scores(df["FIPS"]))
+    features = df[TRAINING_FEATURES].fillna(0)
 
-    svi = _load_svi()
-    if not svi.empty:
-        svi = svi[["FIPS", "RPL_THEMES"]].rename(columns={"RPL_THEMES": "SVI_SCORE"})
-        df = df.merge(svi, on="FIPS", how="left")
-    else:
-        df["SVI_SCORE"] = 0
-
-    df["DAMAGE_PROPERTY_NUM"] = df["DAMAGE_PROPERTY"].apply(_parse_damage)
-    df["DAMAGE_CROPS_NUM"] = df["DAMAGE_CROPS"].apply(_parse_damage)
-    df["INJURIES"] = df["INJURIES_DIRECT"].fillna(0) + df["INJURIES_INDIRECT"].fillna(0)
-    df["DEATHS"] = df["DEATHS_DIRECT"].fillna(0) + df["DEATHS_INDIRECT"].fillna(0)
-
-    df["IS_OUTAGE_EVENT"] = df["EVENT_TYPE"].isin(OUTAGE_EVENT_TYPES).astype(int)
-    df["POWER_OUTAGE_LIKELY"] = (
-        (df["IS_OUTAGE_EVENT"] == 1)
-        & (
-            (df["DAMAGE_PROPERTY_NUM"] >= 1_000_000)
-            | (df["INJURIES"] > 0)
-            | (df["DEATHS"] > 0)
-        )
-    ).astype(int)
-
-    features = df[
-        [
-            "DAMAGE_PROPERTY_NUM",
-            "DAMAGE_CROPS_NUM",
-            "INJURIES",
-            "DEATHS",
-            "MAGNITUDE",
-            "BEGIN_LAT",
-            "BEGIN_LON",
-            "SVI_SCORE",
-        ]
-    ].fillna(0)
-
-    event_type_dummies = pd.get_dummies(df["EVENT_TYPE"], prefix="event")
+    # One byte per event type; sklearn would densify sparse columns on every
+    # fit and predict anyway.
+    event_type_dummies = pd.get_dummies(df["EVENT_TYPE"], prefix="event", dtype=np.uint8)
     X = pd.concat([features, event_type_dummies], axis=1)
     y = df["POWER_OUTAGE_LIKELY"]
     return X, y, df
 
 
-def train_and_cache_model():
-    df = _load_storm_events()
+def _county_sums(df_full):
+    svi = df_full["SVI_SCORE"].astype(float)
+    sums = (
+        df_full.assign(SVI_SCORE=svi, HAS_SVI=svi.notna().astype(int))
+        .groupby(["FIPS", "STATE"], observed=True)
+        .agg(
+            prob_sum=("OUTAGE_PROB", "sum"),
+            svi_sum=("SVI_SCORE", "sum"),
+            svi_count=("HAS_SVI", "sum"),
+            events=("OUTAGE_PROB", "size"),
+        )
+        .reset_index()
+        .rename(columns={"FIPS": "fips"})
+    )
+    sums["fips"] = sums["fips"].astype(str)
+    sums["STATE"] = sums["STATE"].astype(str)
+    return sums
+
+
+def _merge_county_sums(*parts):
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame(columns=["fips", "STATE"] + COUNTY_SUM_COLUMNS)
+    return pd.concat(parts, ignore_index=True).groupby(["fips", "STATE"], as_index=False)[COUNTY_SUM_COLUMNS].sum()
+
+
+def _write_county_risk(sums):
+    county_scores = sums[["fips", "STATE"]].copy()
+    county_scores["risk"] = (sums["prob_sum"] / sums["events"]).round(4)
+    county_scores["svi"] = (sums["svi_sum"] / sums["svi_count"].where(sums["svi_count"] > 0)).fillna(0).round(4)
+
+    # Ensure coverage for all counties using SVI baseline.
+    svi = _load_svi()
+    if not svi.empty:
+        svi = svi[["FIPS", "COUNTY", "STATE", "ST_ABBR", "RPL_THEMES"]].rename(
+            columns={
+                "FIPS": "fips",
+                "COUNTY": "county",
+                "STATE": "state_name",
+                "ST_ABBR": "state_abbr",
+                "RPL_THEMES": "svi",
+            }
+        )
+        svi["fips"] = svi["fips"].str.zfill(5)
+        svi["svi"] = svi["svi"].fillna(0).round(4)
+        svi["risk"] = svi["svi"]
+        county_scores = svi.merge(
+            county_scores[["fips", "risk"]].rename(columns={"risk": "ml_risk"}),
+            on="fips",
+            how="left",
+        )
+        county_scores["ml_risk"] = county_scores["ml_risk"].fillna(0)
+        county_scores["risk"] = (0.7 * county_scores["ml_risk"] + 0.3 * county_scores["svi"]).round(4)
+    # Write then rename so the county store never reads a partial file.
+    tmp_path = f"{COUNTY_RISK_PATH}.tmp"
+    county_scores.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, COUNTY_RISK_PATH)
+
+
+def _load_county_state():
+    if not os.path.exists(COUNTY_STATE_PATH):
+        return None
+    with open(COUNTY_STATE_PATH, "r") as handle:
+        state = json.load(handle)
+    if state.get("version") != COUNTY_STATE_VERSION:
+        return None
+    state["sums"] = pd.DataFrame(state["counties"], columns=["fips", "STATE"] + COUNTY_SUM_COLUMNS)
+    return state
+
+
+def _save_county_state(files, sums):
+    state = {
+        "version": COUNTY_STATE_VERSION,
+        "model_mtime": os.path.getmtime(MODEL_PATH),
+        "files": {name: entry["checksum"] for name, entry in files.items()},
+        "counties": sums[["fips", "STATE"] + COUNTY_SUM_COLUMNS].values.tolist(),
+    }
+    tmp_path = f"{COUNTY_STATE_PATH}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(state, handle)
+    os.replace(tmp_path, COUNTY_STATE_PATH)
+
+
+def train_and_cache_model(backend=None):
+    files = ingest_storm_events()["files"]
+    df = _concat_storm_frames(files)
     if df.empty:
         return None
     X, y, df_full = _prepare_training_data(df)
@@ -133,7 +425,8 @@ def train_and_cache_model():
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
     )
-    model = GradientBoostingClassifier(random_state=42)
+    backend = model_factory.resolve_backend(backend)
+    model = model_factory.make_classifier(backend, {"random_state": 42})
     model.fit(X_train, y_train)
     preds = model.predict(X_test)
     probas = model.predict_proba(X_test)[:, 1]
@@ -151,6 +444,7 @@ def train_and_cache_model():
     metrics = {
         "auc": float(roc_auc_score(y_test, probas)),
         "accuracy": float(accuracy_score(y_test, preds)),
+        "backend": backend,
         "train_rows": int(len(X_train)),
         "test_rows": int(len(X_test)),
         "roc_curve": {"fpr": fpr.tolist(), "tpr": tpr.tolist()},
@@ -161,39 +455,9 @@ def train_and_cache_model():
     with open(METRICS_PATH, "w") as handle:
         json.dump(metrics, handle)
 
-    # Score each event to create county-level risk
-    county_scores = (
-        df_full.groupby(["FIPS", "STATE"])
-        .agg(risk=("OUTAGE_PROB", "mean"), svi=("SVI_SCORE", "mean"))
-        .reset_index()
-        .rename(columns={"FIPS": "fips"})
-    )
-    county_scores["risk"] = county_scores["risk"].round(4)
-    county_scores["svi"] = county_scores["svi"].fillna(0).round(4)
-
-    # Ensure coverage for all counties using SVI baseline.
-    svi = _load_svi()
-    if not svi.empty:
-        svi = svi[["FIPS", "COUNTY", "STATE", "ST_ABBR", "RPL_THEMES"]].rename(
-            columns={
-                "FIPS": "fips",
-                "COUNTY": "county",
-                "STATE": "state_name",
-                "ST_ABBR": "state_abbr",
-                "RPL_THEMES": "svi",
-            }
-        )
-        svi["fips"] = svi["fips"].str.zfill(5)
-        svi["svi"] = svi["svi"].fillna(0).round(4)
-        svi["risk"] = svi["svi"]
-        county_scores = svi.merge(
-            county_scores[["fips", "risk"]].rename(columns={"risk": "ml_risk"}),
-            on="fips",
-            how="left",
-        )
-        county_scores["ml_risk"] = county_scores["ml_risk"].fillna(0)
-        county_scores["risk"] = (0.7 * county_scores["ml_risk"] + 0.3 * county_scores["svi"]).round(4)
-    county_scores.to_csv(COUNTY_RISK_PATH, index=False)
+    sums = _county_sums(df_full)
+    _write_county_risk(sums)
+    _save_county_state(files, sums)
     return model
 
 
@@ -206,11 +470,37 @@ def load_model_bundle():
     return None
 
 
-def get_county_risk():
-    if not os.path.exists(COUNTY_RISK_PATH):
-        train_and_cache_model()
-    if not os.path.exists(COUNTY_RISK_PATH):
-        return pd.DataFrame()
+def update_county_risk():
+    # Fold newly ingested event files into county risk using the existing
+    # model. Full retraining stays with train_and_cache_model.
+    bundle = load_model_bundle()
+    if bundle is None:
+        return None
+    files = ingest_storm_events()["files"]
+    state = _load_county_state()
+
+    scored = state["files"] if state and state["model_mtime"] == os.path.getmtime(MODEL_PATH) else None
+    if scored is not None and all(files.get(name, {}).get("checksum") == checksum for name, checksum in scored.items()):
+        sums = state["sums"]
+    else:
+        # The model changed, or a scored file changed or disappeared; its old
+        # contribution can't be subtracted, so rescore every file (no retrain).
+        scored, sums = {}, _merge_county_sums()
+
+    new_files = {name: entry for name, entry in files.items() if name not in scored}
+    if not new_files:
+        return {"scored_files": [], "events": 0}
+
+    X, _, df_new = _prepare_training_data(_concat_storm_frames(new_files))
+    X = X.reindex(columns=bundle["columns"], fill_value=0)
+    df_new["OUTAGE_PROB"] = bundle["model"].predict_proba(X)[:, 1]
+    sums = _merge_county_sums(sums, _county_sums(df_new))
+    _write_county_risk(sums)
+    _save_county_state({name: files[name] for name in scored.keys() | new_files.keys()}, sums)
+    return {"scored_files": sorted(new_files), "events": int(len(df_new))}
+
+
+def _read_county_risk():
     df = pd.read_csv(COUNTY_RISK_PATH, dtype={"fips": str})
     df["fips"] = df["fips"].str.zfill(5)
     if "county" not in df.columns or "state_abbr" not in df.columns:
@@ -228,6 +518,59 @@ def get_county_risk():
     return df
 
 
+def _build_county_index(df):
+    risks = df["risk"].fillna(0).astype(float).tolist() if "risk" in df.columns else [0.0] * len(df)
+    svis = df["svi"].fillna(0).astype(float).tolist() if "svi" in df.columns else [0.0] * len(df)
+    return {fips: (risk, svi) for fips, risk, svi in zip(df["fips"].tolist(), risks, svis)}
+
+
+def _build_state_index(df):
+    # County FIPS start with the state FIPS, which maps to one abbreviation.
+    if "state_abbr" not in df.columns:
+        return {}
+    known = df.dropna(subset=["state_abbr"])
+    return dict(zip(known["fips"].str[:2], known["state_abbr"]))
+
+
+def load_county_store():
+    # The CSV is read once per process and re-read only when its mtime moves,
+    # e.g. after train_and_cache_model rewrites it.
+    if not os.path.exists(COUNTY_RISK_PATH):
+        train_and_cache_model()
+    if not os.path.exists(COUNTY_RISK_PATH):
+        return _county_store
+    mtime = os.path.getmtime(COUNTY_RISK_PATH)
+    if _county_store["df"] is not None and _county_store["mtime"] == mtime:
+        return _county_store
+    with _county_store_lock:
+        if _county_store["df"] is None or _county_store["mtime"] != mtime:
+            df = _read_county_risk()
+            _county_store["index"] = _build_county_index(df)
+            _county_store["states"] = _build_state_index(df)
+            _county_store["df"] = df
+            _county_store["mtime"] = mtime
+    return _county_store
+
+
+def get_county_risk():
+    df = load_county_store()["df"]
+    if df is None:
+        return pd.DataFrame()
+    return df
+
+
+def get_county_risk_and_svi(fips):
+    if not fips:
+        return 0.0, 0.0
+    return load_county_store()["index"].get(str(fips).zfill(5), (0.0, 0.0))
+
+
+def get_state_abbr(fips):
+    if not fips:
+        return None
+    return load_county_store()["states"].get(str(fips).zfill(5)[:2])
+
+
 def get_model_metrics():
     if not os.path.exists(METRICS_PATH):
         train_and_cache_model()
@@ -247,20 +590,8 @@ def get_model_evaluation():
 
 
 def get_risk_for_county(fips):
-    df = get_county_risk()
-    if df.empty:
-        return 0.0
-    row = df[df["fips"] == str(fips)]
-    if row.empty:
-        return 0.0
-    return float(row.iloc[0]["risk"])
+    return get_county_risk_and_svi(fips)[0]
 
 
 def get_svi_for_county(fips):
-    df = get_county_risk()
-    if df.empty:
-        return 0.0
-    row = df[df["fips"] == str(fips)]
-    if row.empty:
-        return 0.0
-    return float(row.iloc[0].get("svi", 0))
+    return get_county_risk_and_svi(fips)[1]
@@ -0,0 +1,77 @@
+import os
+
+from sklearn.ensemble import (
+    GradientBoostingClassifier,
+    GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from sklearn.linear_model import LinearRegression
+
+
+# "exact" keeps the original single-threaded learners; "hist" bins features
+# into histograms and trains multithreaded, which is much faster on large
+# frames at a small cost in split precision.
+BACKENDS = ("exact", "hist")
+DEFAULT_BACKEND = os.environ.get("MODEL_BACKEND", "exact")
+
+# Forecast hyperparameters used by the Streamlit dashboard.
+FORECAST_MODEL_PARAMS = {
+    "gradient_boosting": {
+        "n_estimators": 100,
+        "learning_rate": 0.1,
+        "max_depth": 5,
+        "min_samples_split": 5,
+        "min_samples_leaf": 2,
+        "random_state": 42,
+    },
+    "random_forest": {
+        "n_estimators": 100,
+        "max_depth": 10,
+        "min_samples_split": 5,
+        "min_samples_leaf": 2,
+        "random_state": 42,
+    },
+}
+
+# Exact-split parameters with no histogram-backend equivalent.
+_EXACT_ONLY_PARAMS = {"min_samples_split", "subsample", "max_features", "criterion"}
+
+
+def resolve_backend(backend=None):
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}")
+    return backend
+
+
+def _hist_params(params):
+    params = {key: value for key, value in params.items() if key not in _EXACT_ONLY_PARAMS}
+    if "n_estimators" in params:
+        params["max_iter"] = params.pop("n_estimators")
+    return params
+
+
+def make_regressor(model_type, backend=None, params=None):
+    backend = resolve_backend(backend)
+    params = dict(params or {})
+    if model_type == "linear_regression":
+        return LinearRegression()
+    if model_type == "random_forest":
+        # sklearn has no histogram forest; the fast backend trains the trees
+        # in parallel instead.
+        if backend == "hist":
+            params.setdefault("n_jobs", -1)
+        return RandomForestRegressor(**params)
+    if backend == "hist":
+        return HistGradientBoostingRegressor(**_hist_params(params))
+    return GradientBoostingRegressor(**params)
+
+
+def make_classifier(backend=None, params=None):
+    backend = resolve_backend(backend)
+    params = dict(params or {})
+    if backend == "hist":
+        return HistGradientBoostingClassifier(**_hist_params(params))
+    return GradientBoostingClassifier(**params)
@@ -1,3 +1,18 @@
+import numpy as np
+import pandas as pd
+
+
+# Facility weighting: hospitals/EMS get a slight uptick to be conservative.
+FACILITY_WEIGHTS = {
+    "hospital": 1.1,
+    "ems": 1.1,
+    "emergency": 1.1,
+    "school": 1.05,
+    "shelter": 1.05,
+}
+COMPONENT_COLUMNS = ["weather_risk", "outage_risk", "anomaly_risk", "ml_risk"]
+
+
 def calculate_blackout_risk(
     weather_summary,
     outage_summary,
@@ -12,13 +27,9 @@ def calculate_blackout_risk(
     if anomaly_summary:
         anomaly_risk = anomaly_summary.get("anomaly_density", 0)
 
-    # Facility weighting: hospitals/EMS get a slight uptick to be conservative.
     facility_weight = 1.0
     if facility_type:
-        if facility_type.lower() in {"hospital", "ems", "emergency"}:
-            facility_weight = 1.1
-        elif facility_type.lower() in {"school", "shelter"}:
-            facility_weight = 1.05
+        facility_weight = FACILITY_WEIGHTS.get(facility_type.lower(), 1.0)
 
     combined = 0.35 * weather_risk + 0.30 * outage_risk + 0.20 * anomaly_risk + 0.15 * ml_risk
     combined *= facility_weight
@@ -35,3 +46,72 @@ def calculate_blackout_risk(
             "facility_weight": facility_weight,
         },
     }
+
+
+def _round4(values):
+    # np.round scales by 10**4 and rounds half-to-even on the scaled value,
+    # which can disagree with Python's correctly-rounded round() when the
+    # input sits next to a tie. Only those rows go through round().
+    rounded = np.round(values, 4)
+    scaled = values * 10_000
+    near_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), 4)
+    return rounded
+
+
+def facility_weights(facility_types):
+    types = pd.Series(facility_types, dtype=object)
+    weights = types.where(types.notna() & (types != ""), None).str.lower().map(FACILITY_WEIGHTS)
+    return weights.fillna(1.0).to_numpy(dtype=float)
+
+
+def calculate_blackout_risk_arrays(
+    weather_risk,
+    outage_risk,
+    anomaly_risk,
+    ml_risk,
+    facility_type=None,
+    sensitivity=1.0,
+):
+    weather_risk = np.nan_to_num(np.asarray(weather_risk, dtype=float))
+    outage_risk = np.nan_to_num(np.asarray(outage_risk, dtype=float))
+    anomaly_risk = np.nan_to_num(np.asarray(anomaly_risk, dtype=float))
+    ml_risk = np.nan_to_num(np.asarray(ml_risk, dtype=float))
+    n = len(weather_risk)
+
+    if facility_type is None:
+        facility_weight = np.ones(n)
+    else:
+        facility_weight = facility_weights(facility_type)
+
+    # Same operation order as calculate_blackout_risk so results match the
+    # scalar version bit for bit.
+    combined = 0.35 * weather_risk + 0.30 * outage_risk + 0.20 * anomaly_risk + 0.15 * ml_risk
+    combined = combined * facility_weight
+    combined = combined * np.broadcast_to(np.asarray(sensitivity, dtype=float), (n,))
+    combined = np.minimum(_round4(combined), 1.0)
+
+    return {
+        "blackout_risk": combined,
+        "weather_risk": weather_risk,
+        "outage_risk": outage_risk,
+        "anomaly_risk": anomaly_risk,
+        "ml_risk": ml_risk,
+        "facility_weight": facility_weight,
+    }
+
+
+def calculate_blackout_risk_frame(df, sensitivity=1.0):
+    if "sensitivity" in df.columns:
+        sensitivity = df["sensitivity"].fillna(sensitivity).to_numpy(dtype=float)
+    columns = {col: df[col] if col in df.columns else np.zeros(len(df)) for col in COMPONENT_COLUMNS}
+    result = calculate_blackout_risk_arrays(
+        columns["weather_risk"],
+        columns["outage_risk"],
+        columns["anomaly_risk"],
+        columns["ml_risk"],
+        facility_type=df["facility_type"] if "facility_type" in df.columns else None,
+        sensitivity=sensitivity,
+    )
+    return pd.DataFrame(result, index=df.index)
@@ -0,0 +1,137 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import county_lookup, ml_risk, outage_data, risk_engine, weather
+
+
+SNAPSHOT_PATH = os.path.join(ml_risk.DATA_DIR, "national_risk.npz")
+SNAPSHOT_FLOAT_COLUMNS = ["blackout_risk", "weather_risk", "outage_risk", "ml_risk", "svi"]
+FORECAST_BATCH_SIZE = 100
+
+_snapshot_lock = threading.Lock()
+_snapshot = {"mtime": None, "df": None, "index": {}, "computed_at": None}
+
+
+def load_centroids(path=None):
+    if not path:
+        return county_lookup.county_centroids()
+    # Census Gazetteer county files are tab-separated with GEOID, INTPTLAT
+    # and INTPTLONG; a plain fips,lat,lon CSV works too.
+    sep = "\t" if path.endswith(".txt") else ","
+    df = pd.read_csv(path, sep=sep, dtype=str)
+    df.columns = [col.strip() for col in df.columns]
+    fips_col = "GEOID" if "GEOID" in df.columns else "fips"
+    lat_col = "INTPTLAT" if "INTPTLAT" in df.columns else "lat"
+    lon_col = "INTPTLONG" if "INTPTLONG" in df.columns else "lon"
+    return {
+        str(fips).zfill(5): (float(lat), float(lon))
+        for fips, lat, lon in zip(df[fips_col], df[lat_col], df[lon_col])
+    }
+
+
+def _fetch_forecasts(points, concurrency):
+    batches = [points[i:i + FORECAST_BATCH_SIZE] for i in range(0, len(points), FORECAST_BATCH_SIZE)]
+
+    def fetch(batch):
+        try:
+            return weather.get_open_meteo_forecasts(batch, hours=72)
+        except Exception:
+            return [{}] * len(batch)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = pool.map(fetch, batches)
+    return [forecast for batch in results for forecast in batch]
+
+
+def _fetch_area_alerts(areas, concurrency):
+    def fetch(area):
+        try:
+            return weather.get_nws_area_alerts(area)
+        except Exception:
+            return {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return dict(zip(areas, pool.map(fetch, areas)))
+
+
+def compute_national_risk(centroids, concurrency=4):
+    counties = ml_risk.get_county_risk()
+    if counties.empty:
+        return pd.DataFrame()
+    counties = counties[["fips", "state_abbr", "risk", "svi"]].copy()
+    counties = counties[counties["fips"].isin(centroids.keys())].reset_index(drop=True)
+    if counties.empty:
+        return pd.DataFrame()
+
+    points = [centroids[fips] for fips in counties["fips"]]
+    forecasts = _fetch_forecasts(points, concurrency)
+    states = sorted(counties["state_abbr"].dropna().unique())
+    county_alerts = weather.alerts_by_county(_fetch_area_alerts(states, concurrency))
+    outage_by_state = {state: outage_data.summarize_outages(state, days=365) for state in states}
+
+    counties["weather_risk"] = [
+        weather.summarize_weather_risk(forecast, {"features": county_alerts.get(fips, [])})["weather_risk"]
+        for fips, forecast in zip(counties["fips"], forecasts)
+    ]
+    counties["outage_risk"] = [
+        outage_by_state.get(state, {}).get("outage_risk", 0) for state in counties["state_abbr"]
+    ]
+    counties["anomaly_risk"] = 0.0
+    counties["ml_risk"] = counties["risk"].fillna(0)
+
+    scored = risk_engine.calculate_blackout_risk_frame(counties)
+    scored["fips"] = counties["fips"]
+    scored["svi"] = counties["svi"].fillna(0)
+    return scored[["fips"] + SNAPSHOT_FLOAT_COLUMNS]
+
+
+def write_snapshot(df, path=None):
+    path = path or SNAPSHOT_PATH
+    arrays = {"fips": df["fips"].to_numpy(dtype="S5"), "computed_at": np.array(time.time())}
+    for col in SNAPSHOT_FLOAT_COLUMNS:
+        arrays[col] = df[col].to_numpy(dtype=np.float32)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    # Write then rename so readers never see a half-written snapshot.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(buffer.getvalue())
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot():
+    with np.load(SNAPSHOT_PATH) as data:
+        df = pd.DataFrame({"fips": data["fips"].astype(str)})
+        for col in SNAPSHOT_FLOAT_COLUMNS:
+            df[col] = data[col].astype(float).round(4)
+        computed_at = float(data["computed_at"])
+    return df, computed_at
+
+
+def load_snapshot():
+    if not os.path.exists(SNAPSHOT_PATH):
+        return None
+    mtime = os.path.getmtime(SNAPSHOT_PATH)
+    if _snapshot["df"] is not None and _snapshot["mtime"] == mtime:
+        return _snapshot
+    with _snapshot_lock:
+        if _snapshot["df"] is None or _snapshot["mtime"] != mtime:
+            df, computed_at = _read_snapshot()
+            _snapshot["index"] = dict(zip(df["fips"], df["blackout_risk"]))
+            _snapshot["df"] = df
+            _snapshot["computed_at"] = computed_at
+            _snapshot["mtime"] = mtime
+    return _snapshot
+
+
+def get_live_risk(fips):
+    snapshot = load_snapshot()
+    if snapshot is None or not fips:
+        return None
+    return snapshot["index"].get(str(fips).zfill(5))
@@ -1,30 +1,183 @@
 import os
-import requests
+import threading
+import time
+
+from django.core.cache import cache
+
+from . import http_client
 
 
 OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+OPEN_METEO_HOURLY = "temperature_2m,precipitation,wind_speed_10m,wind_gusts_10m"
 NWS_ALERTS_URL = "https://api.weather.gov/alerts/active"
 NWS_HEADERS = {"User-Agent": os.environ.get("NWS_USER_AGENT", "SolixaDemo/1.0")}
 
+# Forecasts are cached per grid cell: Open-Meteo updates hourly and nearby
+# points resolve to the same model cell, so snapping loses nothing useful.
+FORECAST_GRID_DEGREES = float(os.environ.get("FORECAST_GRID_DEGREES", "0.05"))
+FORECAST_CACHE_TTL = int(os.environ.get("FORECAST_CACHE_TTL", "900"))
+FORECAST_CACHE_PREFIX = "open_meteo"
+
+# Alerts change often, so entries are only served as-is for a short TTL and
+# then revalidated with If-None-Match/If-Modified-Since; the validators are
+# kept much longer so most revalidations come back as a 304.
+NWS_ALERTS_TTL = int(os.environ.get("NWS_ALERTS_TTL", "60"))
+NWS_ALERTS_RETAIN = int(os.environ.get("NWS_ALERTS_RETAIN", "3600"))
+NWS_ALERTS_PREFIX = "nws_alerts"
+_alert_locks = [threading.Lock() for _ in range(64)]
+
+
+def _snap_to_grid(value, step):
+    if step <= 0:
+        return value
+    return round(round(value / step) * step, 4)
+
+
+def grid_cell(lat, lon):
+    return _snap_to_grid(lat, FORECAST_GRID_DEGREES), _snap_to_grid(lon, FORECAST_GRID_DEGREES)
+
+
+def _count_forecast_cache(outcome):
+    key = f"{FORECAST_CACHE_PREFIX}:stats:{outcome}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_forecast_cache_stats():
+    hits = cache.get(f"{FORECAST_CACHE_PREFIX}:stats:hit", 0)
+    misses = cache.get(f"{FORECAST_CACHE_PREFIX}:stats:miss", 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
+
 
 def get_open_meteo_forecast(lat, lon, hours=72):
+    lat, lon = grid_cell(lat, lon)
+    cache_key = f"{FORECAST_CACHE_PREFIX}:{lat}:{lon}:{hours}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        _count_forecast_cache("hit")
+        return cached
+    _count_forecast_cache("miss")
+
     params = {
         "latitude": lat,
         "longitude": lon,
-        "hourly": "temperature_2m,precipitation,wind_speed_10m,wind_gusts_10m",
+        "hourly": OPEN_METEO_HOURLY,
         "forecast_hours": hours,
         "timezone": "UTC",
     }
-    response = requests.get(OPEN_METEO_URL, params=params, timeout=15)
+    response = http_client.get("open_meteo", OPEN_METEO_URL, params=params)
     response.raise_for_status()
-    return response.json()
+    forecast = response.json()
+    cache.set(cache_key, forecast, FORECAST_CACHE_TTL)
+    return forecast
+
+
+def get_open_meteo_forecasts(points, hours=72):
+    # Open-Meteo takes comma-separated coordinate lists and returns one
+    # forecast per location, so cache misses for a batch cost one request.
+    cells = [grid_cell(lat, lon) for lat, lon in points]
+    forecasts = {}
+    missing = []
+    for cell in dict.fromkeys(cells):
+        cached = cache.get(f"{FORECAST_CACHE_PREFIX}:{cell[0]}:{cell[1]}:{hours}")
+        if cached is not None:
+            _count_forecast_cache("hit")
+            forecasts[cell] = cached
+        else:
+            _count_forecast_cache("miss")
+            missing.append(cell)
+
+    if missing:
+        params = {
+            "latitude": ",".join(str(cell[0]) for cell in missing),
+            "longitude": ",".join(str(cell[1]) for cell in missing),
+            "hourly": OPEN_METEO_HOURLY,
+            "forecast_hours": hours,
+            "timezone": "UTC",
+        }
+        response = http_client.get("open_meteo", OPEN_METEO_URL, params=params)
+        response.raise_for_status()
+        data = response.json()
+        if isinstance(data, dict):
+            data = [data]
+        for cell, forecast in zip(missing, data):
+            cache.set(f"{FORECAST_CACHE_PREFIX}:{cell[0]}:{cell[1]}:{hours}", forecast, FORECAST_CACHE_TTL)
+            forecasts[cell] = forecast
+    return [forecasts.get(cell, {}) for cell in cells]
+
+
+def _fresh_alerts(entry):
+    return entry is not None and time.time() - entry["fetched_at"] < NWS_ALERTS_TTL
 
 
 def get_nws_alerts(lat, lon):
-    params = {"point": f"{lat},{lon}"}
-    response = requests.get(NWS_ALERTS_URL, params=params, headers=NWS_HEADERS, timeout=15)
-    response.raise_for_status()
-    return response.json()
+    # api.weather.gov accepts at most four decimal places for a point.
+    point = f"{round(lat, 4)},{round(lon, 4)}"
+    return _get_cached_alerts(f"{NWS_ALERTS_PREFIX}:point:{point}", {"point": point})
+
+
+def get_nws_area_alerts(area):
+    return _get_cached_alerts(f"{NWS_ALERTS_PREFIX}:area:{area}", {"area": area})
+
+
+def alerts_by_county(area_alerts):
+    # Group area alert features by county FIPS through their SAME codes, so
+    # one request per state covers every county in it.
+    counties = {}
+    seen = set()
+    for alerts in area_alerts.values():
+        for feature in (alerts or {}).get("features", []):
+            same_codes = ((feature.get("properties") or {}).get("geocode") or {}).get("SAME", [])
+            for code in same_codes:
+                # SAME codes are the county FIPS with a leading zero. An alert
+                # spanning two states comes back in both areas' responses.
+                key = (code[-5:], feature.get("id") or id(feature))
+                if key not in seen:
+                    seen.add(key)
+                    counties.setdefault(code[-5:], []).append(feature)
+    return counties
+
+
+def _get_cached_alerts(cache_key, params):
+    entry = cache.get(cache_key)
+    if _fresh_alerts(entry):
+        return entry["data"]
+
+    # Single-flight: concurrent requests for the same key wait on one lock
+    # and pick up the entry written by whichever request got there first.
+    with _alert_locks[hash(cache_key) % len(_alert_locks)]:
+        entry = cache.get(cache_key)
+        if _fresh_alerts(entry):
+            return entry["data"]
+
+        headers = dict(NWS_HEADERS)
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = http_client.get("nws", NWS_ALERTS_URL, params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            entry["fetched_at"] = time.time()
+        else:
+            response.raise_for_status()
+            entry = {
+                "data": response.json(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+            }
+        cache.set(cache_key, entry, NWS_ALERTS_RETAIN)
+        return entry["data"]
 
 
 def summarize_weather_risk(forecast_json, alerts_json):
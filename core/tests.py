@@ -1,3 +1,101 @@
-from django.test import TestCase
+import random
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from core.services import ml_risk, risk_engine
+
+
+class ParseDamageSeriesTests(SimpleTestCase):
+    def assertMatchesScalarParser(self, values):
+        expected = values.map(ml_risk._parse_damage).to_numpy(dtype=float)
+        actual = ml_risk._parse_damage_series(values)
+        self.assertTrue(actual.index.equals(values.index))
+        np.testing.assert_array_equal(actual.to_numpy(dtype=float), expected)
+
+    def test_edge_cases(self):
+        values = [
+            "0", "10K", "10k", "1.5M", "2.5m", "3B", "0.25b", "", "  ", " 7K ",
+            None, np.nan, "nan", "NaN", "inf", "-5K", "1_000", "1_000K",
+            "956171.1862142959", "956171.1862142959K", "0.1000000000000000055511151231257827",
+            "8e 90", "15E 8", "1e3K", "K", "M", "abc", "12KB", "1,000", "0x10",
+        ]
+        for dtype in (object, "string"):
+            with self.subTest(dtype=dtype):
+                self.assertMatchesScalarParser(pd.Series(values, dtype=dtype, index=range(5, 5 + len(values))))
+
+    def test_fuzzed_values(self):
+        rng = random.Random(42)
+        alphabet = "0123456789.eE+-_ KkMmBb"
+        values = []
+        for _ in range(5000):
+            if rng.random() < 0.5:
+                values.append(f"{rng.uniform(0, 1e7):.{rng.randint(0, 17)}f}{rng.choice(['', 'K', 'M', 'B', 'k'])}")
+            else:
+                values.append("".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8))))
+        self.assertMatchesScalarParser(pd.Series(values, dtype=object))
+
+    def test_numeric_input(self):
+        self.assertMatchesScalarParser(pd.Series([0.0, 1.5, np.nan, 956171.1862142959, 1e300]))
+        self.assertMatchesScalarParser(pd.Series([0, 10, 2**53 + 1]))
+
+    def test_empty(self):
+        self.assertMatchesScalarParser(pd.Series([], dtype=object))
+
+
+class BlackoutRiskArraysTests(SimpleTestCase):
+    FACILITY_TYPES = list(risk_engine.FACILITY_WEIGHTS) + ["Hospital", "EMS", "unknown", "", None]
+
+    def assertMatchesScalar(self, weather, outage, anomaly, ml, facility_types, sensitivity):
+        result = risk_engine.calculate_blackout_risk_arrays(
+            weather, outage, anomaly, ml, facility_type=facility_types, sensitivity=sensitivity
+        )
+        sensitivities = np.broadcast_to(np.asarray(sensitivity, dtype=float), (len(weather),))
+        for i in range(len(weather)):
+            # Callers pass plain floats parsed from JSON; round() on a numpy
+            # scalar would use numpy's rounding instead of Python's.
+            expected = risk_engine.calculate_blackout_risk(
+                {"weather_risk": float(weather[i])},
+                {"outage_risk": float(outage[i])},
+                {"anomaly_density": float(anomaly[i])},
+                facility_type=facility_types[i],
+                ml_risk=float(ml[i]),
+                sensitivity=float(sensitivities[i]),
+            )
+            self.assertEqual(result["blackout_risk"][i], expected["blackout_risk"], msg=f"row {i}")
+            self.assertEqual(result["facility_weight"][i], expected["components"]["facility_weight"], msg=f"row {i}")
+
+    def test_tie_adjacent_values(self):
+        # Weather risks whose combined score lands on, or a few ulps either
+        # side of, a fourth-decimal tie.
+        ties = (np.arange(0, 10_000, 37) + 0.5) / 10_000 / 0.35
+        weather = np.concatenate([ties] + [
+            np.nextafter(ties, direction, dtype=float) for direction in (np.inf, -np.inf)
+        ])
+        for step in range(2, 6):
+            weather = np.concatenate([weather, ties + step * np.spacing(ties), ties - step * np.spacing(ties)])
+        zeros = np.zeros(len(weather))
+        for facility_type in self.FACILITY_TYPES:
+            with self.subTest(facility_type=facility_type):
+                self.assertMatchesScalar(weather, zeros, zeros, zeros, [facility_type] * len(weather), 1.0)
+
+    def test_fuzzed_rows_with_per_row_sensitivity(self):
+        rng = np.random.default_rng(42)
+        n = 20_000
+        weather, outage, anomaly, ml = (rng.random(n) for _ in range(4))
+        facility_types = [self.FACILITY_TYPES[i] for i in rng.integers(0, len(self.FACILITY_TYPES), n)]
+        sensitivity = rng.uniform(0.5, 2.0, n)
+        self.assertMatchesScalar(weather, outage, anomaly, ml, facility_types, sensitivity)
+        self.assertMatchesScalar(weather, outage, anomaly, ml, facility_types, 0.8)
+
+    def test_default_facility_type(self):
+        values = np.linspace(0, 1, 101)
+        result = risk_engine.calculate_blackout_risk_arrays(values, values, values, values)
+        expected = [
+            risk_engine.calculate_blackout_risk(
+                {"weather_risk": v}, {"outage_risk": v}, {"anomaly_density": v}, ml_risk=v
+            )["blackout_risk"]
+            for v in values.tolist()
+        ]
+        np.testing.assert_array_equal(result["blackout_risk"], expected)
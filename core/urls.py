@@ -7,10 +7,13 @@ urlpatterns = [
     path("geocode", views.geocode, name="geocode"),
     path("weather/forecast", views.weather_forecast, name="weather_forecast"),
     path("weather/alerts", views.weather_alerts, name="weather_alerts"),
+    path("upstream/status", views.upstream_status, name="upstream_status"),
     path("outages/history", views.outage_history, name="outage_history"),
     path("anomalies/score", views.anomaly_score, name="anomaly_score"),
     path("anomalies/sample", views.anomaly_sample, name="anomaly_sample"),
+    path("anomalies/stream", views.anomaly_stream, name="anomaly_stream"),
     path("blackout/risk", views.blackout_risk, name="blackout_risk"),
+    path("blackout/risk/batch", views.blackout_risk_batch, name="blackout_risk_batch"),
     path("blackout/choropleth", views.blackout_choropleth, name="blackout_choropleth"),
     path("model/metrics", views.model_metrics, name="model_metrics"),
     path("model/evaluation", views.model_evaluation, name="model_evaluation"),
@@ -1,12 +1,34 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor, wait
 
-import requests
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
 from .services import anomaly as anomaly_service
-from .services import ai_chat, alerting, ml_risk, outage_data, risk_engine, weather
+from .services import anomaly_registry
+from .services import anomaly_stream as anomaly_stream_service
+from .services import geocode as geocode_service
+from .services import (
+    ai_chat,
+    alerting,
+    choropleth,
+    county_lookup,
+    http_client,
+    ml_risk,
+    outage_data,
+    risk_engine,
+    weather,
+)
+
+
+UPSTREAM_TIMEOUT = 20
+MAX_BATCH_FACILITIES = 1000
+BATCH_UPSTREAM_CONCURRENCY = int(os.environ.get("BATCH_UPSTREAM_CONCURRENCY", "8"))
+_upstream_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="solixa-upstream")
+# Batch requests can queue thousands of calls; they get their own smaller
+# pool so single-facility requests never wait behind them.
+_batch_pool = ThreadPoolExecutor(max_workers=BATCH_UPSTREAM_CONCURRENCY, thread_name_prefix="solixa-batch")
 
 
 def _parse_float(value, default=None):
@@ -23,11 +45,31 @@ def _parse_int(value, default=None):
         return default
 
 
+def _parse_str(value):
+    # JSON bodies can carry any type; keep strings, stringify plain numbers
+    # and drop everything else.
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+
 def _lookup_county_fips(lat, lon):
-    response = requests.get(
+    county_fips = county_lookup.lookup_county_fips(lat, lon)
+    if county_fips:
+        return county_fips
+
+    # Points outside the local boundary file (or no file at all) fall back
+    # to the FCC census area API.
+    return _lookup_county_fips_fcc(lat, lon)
+
+
+def _lookup_county_fips_fcc(lat, lon):
+    response = http_client.get(
+        "fcc",
         "https://geo.fcc.gov/api/census/area",
         params={"lat": lat, "lon": lon, "format": "json"},
-        timeout=15,
     )
     response.raise_for_status()
     data = response.json()
@@ -38,20 +80,38 @@ def _lookup_county_fips(lat, lon):
     return county_fips
 
 
+def _fetch_concurrently(calls, pool=None):
+    # Run independent upstream calls in parallel; a failing or slow call only
+    # yields its fallback value instead of failing the whole request. All
+    # calls share one deadline, so the wait is bounded by the slowest call;
+    # calls still queued at the deadline are cancelled.
+    pool = pool or _upstream_pool
+    futures = {name: pool.submit(fn, *args) for name, (fn, args, _) in calls.items()}
+    wait(futures.values(), timeout=UPSTREAM_TIMEOUT)
+    results = {}
+    errors = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            results[name] = calls[name][2]
+            errors[name] = f"Timed out after {UPSTREAM_TIMEOUT}s"
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as exc:
+            results[name] = calls[name][2]
+            errors[name] = str(exc) or exc.__class__.__name__
+    return results, errors
+
+
 @csrf_exempt
 def geocode(request):
     query = request.GET.get("query")
     if not query:
         return JsonResponse({"error": "Missing query parameter."}, status=400)
 
-    response = requests.get(
-        "https://nominatim.openstreetmap.org/search",
-        params={"q": query, "format": "json", "limit": 3},
-        headers={"User-Agent": "SolixaDemo/1.0"},
-        timeout=15,
-    )
-    response.raise_for_status()
-    return JsonResponse({"results": response.json()})
+    results = geocode_service.search(query)
+    return JsonResponse({"results": results})
 
 
 @csrf_exempt
@@ -78,6 +138,16 @@ def weather_alerts(request):
     return JsonResponse(alerts)
 
 
+@csrf_exempt
+def upstream_status(request):
+    return JsonResponse(
+        {
+            "forecast_cache": weather.get_forecast_cache_stats(),
+            "breakers": http_client.get_breaker_states(),
+        }
+    )
+
+
 @csrf_exempt
 def outage_history(request):
     state = request.GET.get("state")
@@ -92,10 +162,11 @@ def anomaly_score(request):
         return JsonResponse({"error": "POST required."}, status=405)
 
     df = None
+    payload = {}
     if request.FILES:
         upload = request.FILES.get("file")
         if upload:
-            df = anomaly_service.load_inverter_csv(upload.read())
+            df = anomaly_service.load_inverter_csv_stream(upload)
     else:
         try:
             payload = json.loads(request.body.decode("utf-8") or "{}")
@@ -109,7 +180,12 @@ def anomaly_score(request):
         return JsonResponse({"error": "No valid inverter data provided."}, status=400)
 
     contamination = _parse_float(request.GET.get("contamination"), anomaly_service.DEFAULT_CONTAMINATION)
-    scored = anomaly_service.detect_anomalies(df, contamination=contamination)
+    site = request.GET.get("site") or payload.get("site")
+    model_info = None
+    if site:
+        scored, model_info = anomaly_registry.score_for_site(df, site, contamination=contamination)
+    else:
+        scored = anomaly_service.detect_anomalies(df, contamination=contamination)
 
     anomaly_count = int(scored["anomaly"].sum())
     anomaly_density = round(anomaly_count / max(len(scored), 1), 4)
@@ -123,6 +199,36 @@ def anomaly_score(request):
             "anomaly_count": anomaly_count,
             "anomaly_density": anomaly_density,
             "sample_anomalies": sample,
+            "model": model_info,
+        }
+    )
+
+
+@csrf_exempt
+def anomaly_stream(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required."}, status=405)
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except json.JSONDecodeError:
+        payload = {}
+    site = payload.get("site") or request.GET.get("site")
+    records = payload.get("records") or payload.get("data")
+    if not site or not records:
+        return JsonResponse({"error": "site and records are required."}, status=400)
+
+    scored = anomaly_stream_service.score_stream(site, records, reset=bool(payload.get("reset")))
+    if scored.empty:
+        return JsonResponse({"site": site, "rows": 0, "anomaly_count": 0, "points": []})
+
+    points = scored[["TIME_STAMP", "SOURCE_ID", "Value", "anomaly", "anomaly_score", "zscore"]]
+    points = points.astype(object).where(points.notna(), None).to_dict(orient="records")
+    return JsonResponse(
+        {
+            "site": site,
+            "rows": int(len(scored)),
+            "anomaly_count": int(scored["anomaly"].sum()),
+            "points": points,
         }
     )
 
@@ -135,7 +241,7 @@ def anomaly_sample(request):
         return JsonResponse({"error": "Sample inverter data not found."}, status=404)
 
     with open(sample_path, "rb") as handle:
-        df = anomaly_service.load_inverter_csv(handle.read())
+        df = anomaly_service.load_inverter_csv_stream(handle)
 
     if df is None or df.empty:
         return JsonResponse({"error": "Sample inverter data invalid."}, status=400)
@@ -168,15 +274,21 @@ def blackout_risk(request):
     if lat is None or lon is None:
         return JsonResponse({"error": "Missing lat/lon parameters."}, status=400)
 
-    forecast = weather.get_open_meteo_forecast(lat, lon, hours=72)
-    alerts = weather.get_nws_alerts(lat, lon)
+    upstream, upstream_errors = _fetch_concurrently(
+        {
+            "forecast": (weather.get_open_meteo_forecast, (lat, lon, 72), {}),
+            "alerts": (weather.get_nws_alerts, (lat, lon), {}),
+            "county_fips": (_lookup_county_fips, (lat, lon), None),
+        }
+    )
+    forecast = upstream["forecast"]
+    alerts = upstream["alerts"]
+    county_fips = upstream["county_fips"]
     weather_summary = weather.summarize_weather_risk(forecast, alerts)
     outage_summary = outage_data.summarize_outages(state, days=365)
 
     anomaly_summary = {"anomaly_density": anomaly_density}
-    county_fips = _lookup_county_fips(lat, lon)
-    ml_county_risk = ml_risk.get_risk_for_county(county_fips) if county_fips else 0
-    svi_score = ml_risk.get_svi_for_county(county_fips) if county_fips else 0
+    ml_county_risk, svi_score = ml_risk.get_county_risk_and_svi(county_fips)
     risk = risk_engine.calculate_blackout_risk(
         weather_summary,
         outage_summary,
@@ -194,28 +306,186 @@ def blackout_risk(request):
             "county_fips": county_fips,
             "ml_county_risk": ml_county_risk,
             "svi_score": svi_score,
+            "upstream_errors": upstream_errors,
         }
     )
 
 
+def _parse_facilities(payload):
+    facilities = []
+    for i, item in enumerate(payload.get("facilities") or []):
+        if not isinstance(item, dict):
+            continue
+        lat = _parse_float(item.get("lat"))
+        lon = _parse_float(item.get("lon"))
+        if lat is None or lon is None:
+            continue
+        facilities.append(
+            {
+                "id": item.get("id", i),
+                "lat": lat,
+                "lon": lon,
+                "state": _parse_str(item.get("state")),
+                "facility_type": _parse_str(item.get("facilityType")),
+                "anomaly_density": _parse_float(item.get("anomalyDensity"), 0),
+                "sensitivity": _parse_float(item.get("sensitivity")),
+            }
+        )
+    return facilities
+
+
+def _point_key(lat, lon):
+    # api.weather.gov takes four decimal places, so facilities that agree to
+    # that precision share alert and FCC lookups.
+    return round(lat, 4), round(lon, 4)
+
+
+def _score_facilities(facilities, sensitivity):
+    # The forecast is shared per grid cell and NWS alerts per state, mapped
+    # to each facility's own county. The county comes from the facility's
+    # point, since a snapped cell centre can sit in a neighbouring county.
+    cells = {weather.grid_cell(f["lat"], f["lon"]) for f in facilities}
+    facility_fips = county_lookup.lookup_county_fips_batch(
+        [f["lat"] for f in facilities], [f["lon"] for f in facilities]
+    )
+    unresolved = {_point_key(f["lat"], f["lon"]) for f, fips in zip(facilities, facility_fips) if not fips}
+    # Points the local index misses are resolved by FCC in the same round,
+    # so their alert states come from the facility's own state field.
+    states = {ml_risk.get_state_abbr(fips) for fips in facility_fips if fips}
+    states |= {f["state"].upper() for f in facilities if f["state"] and len(f["state"]) == 2}
+    states.discard(None)
+
+    calls = {}
+    for cell in cells:
+        calls[f"forecast:{cell[0]},{cell[1]}"] = (weather.get_open_meteo_forecast, (cell[0], cell[1], 72), {})
+    for state in states:
+        calls[f"alerts:{state}"] = (weather.get_nws_area_alerts, (state,), {})
+    for point in unresolved:
+        calls[f"county_fips:{point[0]},{point[1]}"] = (_lookup_county_fips_fcc, point, None)
+    upstream, upstream_errors = _fetch_concurrently(calls, pool=_batch_pool)
+
+    county_alerts = weather.alerts_by_county({state: upstream[f"alerts:{state}"] for state in states})
+    facility_cells = [weather.grid_cell(f["lat"], f["lon"]) for f in facilities]
+    facility_fips = [
+        fips or upstream[f"county_fips:{point[0]},{point[1]}"]
+        for fips, point in zip(facility_fips, (_point_key(f["lat"], f["lon"]) for f in facilities))
+    ]
+    weather_by_location = {}
+    for cell, fips in set(zip(facility_cells, facility_fips)):
+        weather_by_location[cell, fips] = weather.summarize_weather_risk(
+            upstream[f"forecast:{cell[0]},{cell[1]}"], {"features": county_alerts.get(fips, [])}
+        )
+    facility_weather = [weather_by_location[location] for location in zip(facility_cells, facility_fips)]
+
+    outage_by_state = {
+        state: outage_data.summarize_outages(state, days=365) for state in {f["state"] for f in facilities}
+    }
+
+    county_scores = [ml_risk.get_county_risk_and_svi(fips) for fips in facility_fips]
+    scored = risk_engine.calculate_blackout_risk_arrays(
+        [summary.get("weather_risk", 0) for summary in facility_weather],
+        [outage_by_state[f["state"]].get("outage_risk", 0) for f in facilities],
+        [f["anomaly_density"] for f in facilities],
+        [score[0] for score in county_scores],
+        facility_type=[f["facility_type"] for f in facilities],
+        sensitivity=[f["sensitivity"] or sensitivity for f in facilities],
+    )
+
+    results = []
+    for i, facility in enumerate(facilities):
+        results.append(
+            {
+                "id": facility["id"],
+                "lat": facility["lat"],
+                "lon": facility["lon"],
+                "risk": {
+                    "blackout_risk": float(scored["blackout_risk"][i]),
+                    "components": {
+                        name: float(scored[name][i])
+                        for name in risk_engine.COMPONENT_COLUMNS + ["facility_weight"]
+                    },
+                },
+                "weather_summary": facility_weather[i],
+                "county_fips": facility_fips[i],
+                "ml_county_risk": county_scores[i][0],
+                "svi_score": county_scores[i][1],
+            }
+        )
+    return results, upstream_errors
+
+
+@csrf_exempt
+def blackout_risk_batch(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required."}, status=405)
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except json.JSONDecodeError:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
+
+    facilities = _parse_facilities(payload)
+    if not facilities:
+        return JsonResponse({"error": "No valid facilities provided."}, status=400)
+    if len(facilities) > MAX_BATCH_FACILITIES:
+        return JsonResponse(
+            {"error": f"At most {MAX_BATCH_FACILITIES} facilities per request."}, status=400
+        )
+
+    sensitivity = _parse_float(payload.get("sensitivity"), 1.0) or 1.0
+    results, upstream_errors = _score_facilities(facilities, sensitivity)
+
+    response_format = request.GET.get("format") or payload.get("format")
+    if response_format == "ndjson":
+        def rows():
+            for result in results:
+                yield json.dumps(result) + "\n"
+            if upstream_errors:
+                yield json.dumps({"upstream_errors": upstream_errors}) + "\n"
+
+        return StreamingHttpResponse(rows(), content_type="application/x-ndjson")
+
+    return JsonResponse({"facilities": results, "upstream_errors": upstream_errors})
+
+
+def _etag_matches(if_none_match, etag):
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so a W/ prefix is ignored.
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
 @csrf_exempt
 def blackout_choropleth(request):
-    state = request.GET.get("state")
-    df = ml_risk.get_county_risk()
-    if df.empty:
-        return JsonResponse({"counties": []})
-
-    if state:
-        state = state.strip()
-        if len(state) == 2 and "state_abbr" in df.columns:
-            df = df[df["state_abbr"].str.upper() == state.upper()]
-        elif "state_name" in df.columns:
-            df = df[df["state_name"].str.upper() == state.upper()]
-        elif "STATE" in df.columns:
-            df = df[df["STATE"].str.upper() == state.upper()]
-
-    counties = df.to_dict(orient="records")
-    return JsonResponse({"counties": counties})
+    layout = request.GET.get("format") or "records"
+    if layout not in choropleth.LAYOUTS:
+        return JsonResponse({"error": f"Unknown format: {layout}."}, status=400)
+    fields = [field.strip() for field in request.GET.get("fields", "").split(",") if field.strip()]
+    unknown = [field for field in fields if field not in choropleth.available_fields()]
+    if unknown:
+        return JsonResponse({"error": f"Unknown fields: {', '.join(unknown)}."}, status=400)
+
+    payload = choropleth.get_payload(request.GET.get("state"), fields=fields, layout=layout)
+    accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if payload["br"] and "br" in accept_encoding:
+        encoding, body = "br", payload["br"]
+    elif "gzip" in accept_encoding:
+        encoding, body = "gzip", payload["gzip"]
+    else:
+        encoding, body = None, payload["body"]
+    # Each encoding is its own representation, so it gets its own ETag.
+    etag = payload["etag"] if encoding is None else f'{payload["etag"][:-1]}-{encoding}"'
+
+    if _etag_matches(request.META.get("HTTP_IF_NONE_MATCH", ""), etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    response["Vary"] = "Accept-Encoding"
+    return response
 
 
 @csrf_exempt
@@ -4,21 +4,22 @@ import numpy as np
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import plotly.express as px
-from sklearn.ensemble import IsolationForest, RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import IsolationForest
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 from sklearn.preprocessing import StandardScaler
 from datetime import date, datetime, timedelta
+from joblib import Parallel, delayed
 import json
 import warnings
-import requests
+from core.services import anomaly as anomaly_service, http_client, model_factory
 warnings.filterwarnings('ignore')
 
 # ==================== CONFIGURATION ====================
 MAX_FILE_SIZE = 100_000_000  # 100MB
 MIN_DATA_ROWS = 10
 DEFAULT_CONTAMINATION = 0.02
+MAX_CHART_POINTS = 2000  # per trace, after downsampling
 
 # ==================== CUSTOM STYLING ====================
 # ==================== CUSTOM STYLING ====================
@@ -661,6 +662,61 @@ def load_clean_data(file_content):
     st.success(f"✅ Successfully loaded **{len(df):,}** data points")
     return df
 
+# ==================== CHART DOWNSAMPLING ====================
+def _lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: pick n_out indices that keep the visual shape."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def downsample_indices(x, y, max_points=MAX_CHART_POINTS, keep=None):
+    """Row positions to plot: LTTB over finite points, plus every kept row and gap break."""
+    x = pd.Series(x)
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype('int64')
+    x = x.to_numpy(dtype=float)
+    y = pd.Series(y).to_numpy(dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    
+    finite = np.isfinite(y)
+    # The first missing row after observed data breaks the line in Plotly;
+    # keep it so gaps survive downsampling.
+    forced = ~finite & np.concatenate(([False], finite[:-1]))
+    if keep is not None:
+        forced |= np.asarray(keep, dtype=bool) & finite
+    
+    positions = np.flatnonzero(finite)
+    budget = max(max_points - int(forced.sum()), 3)
+    sampled = positions[_lttb_indices(x[positions], y[positions], budget)]
+    return np.union1d(sampled, np.flatnonzero(forced))
+
+def downsample_frame(df, x_col, y_col, max_points=MAX_CHART_POINTS, keep=None):
+    """Downsampled view of df for plotting; keep is a boolean mask of rows that must stay."""
+    if len(df) <= max_points:
+        return df
+    return df.iloc[downsample_indices(df[x_col], df[y_col], max_points, keep)]
+
 # ==================== ANOMALY DETECTION ====================
 @st.cache_data
 def detect_anomalies(df, contamination=DEFAULT_CONTAMINATION):
@@ -699,9 +755,28 @@ def detect_anomalies(df, contamination=DEFAULT_CONTAMINATION):
     
     return df
 
+def _detect_inverter_efficiency_anomalies(inv, inv_df, full_range, contamination):
+    """Reindex one inverter onto the shared 15-minute range and flag efficiency anomalies."""
+    inv_df = inv_df.set_index('TIME_STAMP')
+    inv_df = inv_df.reindex(full_range)
+    inv_df['SOURCE_ID'] = inv
+    inv_df = inv_df.rename_axis('TIME_STAMP').reset_index()
+    inv_df['anomaly'] = False
+    mask = inv_df['EFFICIENCY_%'] > 0
+    
+    if mask.sum() > 10:
+        model = IsolationForest(
+            contamination=contamination, 
+            random_state=42, 
+            n_estimators=200,
+            max_samples='auto'
+        )
+        inv_df.loc[mask, 'anomaly'] = model.fit_predict(inv_df.loc[mask, ['EFFICIENCY_%']]) == -1
+    return inv_df
+
 @st.cache_data
 def detect_efficiency_anomalies(df, contamination=DEFAULT_CONTAMINATION):
-    """Enhanced efficiency anomaly detection with dropdown."""
+    """Per-inverter efficiency anomalies as a compact frame (no chart)."""
     try:
         df_clean = df[df['EFFICIENCY_%'].between(0.1, 100)].copy()
         if df_clean.empty:
@@ -709,96 +784,72 @@ def detect_efficiency_anomalies(df, contamination=DEFAULT_CONTAMINATION):
         
         df_clean['TIME_STAMP'] = pd.to_datetime(df_clean['TIME_STAMP'])
         df_clean = df_clean.sort_values(['SOURCE_ID', 'TIME_STAMP'])
-        full_range = pd.date_range(start=df_clean['TIME_STAMP'].min(), end=df_clean['TIME_STAMP'].max(), freq='15T')
-        
-        all_data = []
-        inverter_list = sorted(df_clean['SOURCE_ID'].unique())
-
-        for inv in inverter_list:
-            inv_df = df_clean[df_clean['SOURCE_ID'] == inv].copy()
-            inv_df = inv_df.set_index('TIME_STAMP')
-            inv_df = inv_df.reindex(full_range)
-            inv_df['SOURCE_ID'] = inv
-            inv_df = inv_df.rename_axis('TIME_STAMP').reset_index()
-            inv_df['anomaly'] = False
-            mask = inv_df['EFFICIENCY_%'] > 0
-            
-            if mask.sum() > 10:
-                model = IsolationForest(
-                    contamination=contamination, 
-                    random_state=42, 
-                    n_estimators=200,
-                    max_samples='auto'
-                )
-                inv_df.loc[mask, 'anomaly'] = model.fit_predict(inv_df.loc[mask, ['EFFICIENCY_%']]) == -1
-            all_data.append(inv_df)
-
-        final_df = pd.concat(all_data, ignore_index=True)
-        final_df['Status'] = final_df['anomaly'].map({True: 'Anomaly', False: 'Normal'})
-
-        fig = go.Figure()
-        dropdowns = []
-
-        for i, inv in enumerate(inverter_list):
-            temp = final_df[final_df['SOURCE_ID'] == inv]
-            fig.add_trace(go.Scatter(
-                x=temp['TIME_STAMP'], 
-                y=temp['EFFICIENCY_%'], 
-                mode='lines', 
-                name=f'{inv} Efficiency', 
-                visible=(i == 0), 
-                line=dict(color='#3b82f6', width=2),
-                hovertemplate='<b>Time:</b> %{x}<br><b>Efficiency:</b> %{y:.2f}%<extra></extra>'
-            ))
-            fig.add_trace(go.Scatter(
-                x=temp[temp['anomaly']]['TIME_STAMP'], 
-                y=temp[temp['anomaly']]['EFFICIENCY_%'], 
-                mode='markers', 
-                name=f'{inv} Anomaly', 
-                visible=(i == 0), 
-                marker=dict(color='#ef4444', size=10, symbol='x'),
-                hovertemplate='<b>⚠️ Anomaly</b><br><b>Time:</b> %{x}<br><b>Efficiency:</b> %{y:.2f}%<extra></extra>'
-            ))
-            
-            vis_flags = [False] * (2 * len(inverter_list))
-            vis_flags[2 * i] = True
-            vis_flags[2 * i + 1] = True
-            dropdowns.append(dict(
-                label=inv, 
-                method='update', 
-                args=[
-                    {'visible': vis_flags}, 
-                    {'title': f'Efficiency Analysis for {inv}'}
-                ]
-            ))
-
-        fig.update_layout(
-            updatemenus=[dict(
-                active=0, 
-                buttons=dropdowns, 
-                x=1.05, 
-                xanchor='left', 
-                y=1.15, 
-                yanchor='top',
-                bgcolor='#3b82f6',
-                bordercolor='#1e3a8a',
-                font=dict(color='white')
-            )],
-            title=f'Efficiency Analysis for {inverter_list[0]}',
-            xaxis_title='Timestamp',
-            yaxis_title='Efficiency (%)',
-            height=600,
-            template='plotly_white',
-            hovermode='x unified'
+        range_start = df_clean['TIME_STAMP'].min()
+        range_end = df_clean['TIME_STAMP'].max()
+        full_range = pd.date_range(start=range_start, end=range_end, freq='15min')
+        
+        # One groupby pass instead of a boolean mask per inverter; each
+        # inverter's forest is independent, so the fits run across cores.
+        groups = [(inv, inv_df) for inv, inv_df in df_clean.groupby('SOURCE_ID', sort=True)]
+        all_data = Parallel(n_jobs=-1)(
+            delayed(_detect_inverter_efficiency_anomalies)(inv, inv_df, full_range, contamination)
+            for inv, inv_df in groups
         )
-        return fig
+
+        # Keep only observed points and the columns the chart needs; the gaps
+        # are restored by reindexing when a single inverter is drawn.
+        results = pd.concat(all_data, ignore_index=True)
+        results = results.dropna(subset=['EFFICIENCY_%'])[['TIME_STAMP', 'SOURCE_ID', 'EFFICIENCY_%', 'anomaly']]
+        results['SOURCE_ID'] = results['SOURCE_ID'].astype('category')
+        results['EFFICIENCY_%'] = results['EFFICIENCY_%'].astype('float32')
+        results['anomaly'] = results['anomaly'].astype(bool)
+        results = results.reset_index(drop=True)
+        results.attrs['range_start'] = range_start
+        results.attrs['range_end'] = range_end
+        return results
     except Exception as e:
         st.error(f"❌ Error in efficiency anomaly detection: {str(e)}")
         return None
 
+def build_efficiency_figure(results, inverter):
+    """Efficiency chart for one inverter, built from the cached results frame."""
+    full_range = pd.date_range(start=results.attrs['range_start'], end=results.attrs['range_end'], freq='15min')
+    temp = results[results['SOURCE_ID'] == inverter].set_index('TIME_STAMP')
+    temp = temp.reindex(full_range).rename_axis('TIME_STAMP').reset_index()
+    temp['anomaly'] = temp['anomaly'].fillna(False).astype(bool)
+    # Anomalies stay on the line so the markers sit on a drawn point.
+    temp = downsample_frame(temp, 'TIME_STAMP', 'EFFICIENCY_%', keep=temp['anomaly'])
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=temp['TIME_STAMP'], 
+        y=temp['EFFICIENCY_%'], 
+        mode='lines', 
+        name=f'{inverter} Efficiency', 
+        line=dict(color='#3b82f6', width=2),
+        hovertemplate='<b>Time:</b> %{x}<br><b>Efficiency:</b> %{y:.2f}%<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=temp[temp['anomaly']]['TIME_STAMP'], 
+        y=temp[temp['anomaly']]['EFFICIENCY_%'], 
+        mode='markers', 
+        name=f'{inverter} Anomaly', 
+        marker=dict(color='#ef4444', size=10, symbol='x'),
+        hovertemplate='<b>⚠️ Anomaly</b><br><b>Time:</b> %{x}<br><b>Efficiency:</b> %{y:.2f}%<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'Efficiency Analysis for {inverter}',
+        xaxis_title='Timestamp',
+        yaxis_title='Efficiency (%)',
+        height=600,
+        template='plotly_white',
+        hovermode='x unified'
+    )
+    return fig
+
 # ==================== ENHANCED FORECASTING ====================
 @st.cache_data(show_spinner=False)
-def run_forecast(df, model_type='gradient_boosting'):
+def run_forecast(df, model_type='gradient_boosting', backend='exact'):
     """Enhanced forecasting with improved accuracy and features."""
     try:
         df = df.copy()
@@ -808,27 +859,8 @@ def run_forecast(df, model_type='gradient_boosting'):
         if len(df) < 50:
             return pd.DataFrame(), {}, "Need at least 50 data points for forecasting"
         
-        df["time_index"] = range(len(df))
-        df["hour"] = df["TIME_STAMP"].dt.hour
-        df["day_of_week"] = df["TIME_STAMP"].dt.dayofweek
-        df["month"] = df["TIME_STAMP"].dt.month
-        df["day_of_year"] = df["TIME_STAMP"].dt.dayofyear
-        df["is_weekend"] = (df["day_of_week"] >= 5).astype(int)
-        
-        df["rolling_mean_3"] = df["AC_POWER_FIXED"].rolling(window=3, min_periods=1).mean()
-        df["rolling_std_3"] = df["AC_POWER_FIXED"].rolling(window=3, min_periods=1).std().fillna(0)
-        df["rolling_mean_7"] = df["AC_POWER_FIXED"].rolling(window=7, min_periods=1).mean()
-        
-        df["lag_1"] = df["AC_POWER_FIXED"].shift(1).fillna(df["AC_POWER_FIXED"].mean())
-        df["lag_2"] = df["AC_POWER_FIXED"].shift(2).fillna(df["AC_POWER_FIXED"].mean())
-        
-        feature_cols = [
-            "time_index", "hour", "day_of_week", "month", "day_of_year",
-            "is_weekend", "rolling_mean_3", "rolling_std_3", "rolling_mean_7", 
-            "lag_1", "lag_2"
-        ]
-        
-        X = df[feature_cols].fillna(0)
+        # Shared across model types and reused when rows are appended.
+        X = anomaly_service.build_forecast_features(df)
         y = df["AC_POWER_FIXED"]
         
         X_train, X_test, y_train, y_test = train_test_split(
@@ -838,7 +870,7 @@ def run_forecast(df, model_type='gradient_boosting'):
         # Train model based on type
         if model_type == 'linear_regression':
             # Simple linear regression uses ONLY time as predictor
-            model = LinearRegression()
+            model = model_factory.make_regressor(model_type)
             X_train_simple = X_train[['time_index']]
             X_test_simple = X_test[['time_index']]
             model.fit(X_train_simple, y_train)
@@ -847,28 +879,8 @@ def run_forecast(df, model_type='gradient_boosting'):
             # Use simple features for cross-validation
             cv_scores = cross_val_score(model, X_train_simple, y_train, cv=min(5, len(X_train)//10), scoring='r2')
         
-        elif model_type == 'gradient_boosting':
-            model = GradientBoostingRegressor(
-                n_estimators=100,
-                learning_rate=0.1,
-                max_depth=5,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42
-            )
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-            y_train_pred = model.predict(X_train)
-            cv_scores = cross_val_score(model, X_train, y_train, cv=min(5, len(X_train)//10), scoring='r2')
-        
-        elif model_type == 'random_forest':
-            model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42
-            )
+        else:
+            model = model_factory.make_regressor(model_type, backend, model_factory.FORECAST_MODEL_PARAMS[model_type])
             model.fit(X_train, y_train)
             y_pred = model.predict(X_test)
             y_train_pred = model.predict(X_train)
@@ -907,6 +919,7 @@ def run_forecast(df, model_type='gradient_boosting'):
             'mean_actual': y_test.mean(),
             'mean_predicted': np.mean(y_pred),
             'model_type': model_type,
+            'backend': backend,
             'test_points': len(y_test)
         }
         
@@ -1237,7 +1250,7 @@ def analyze_inverter_performance(df):
 def send_to_zapier(data, webhook_url):
     """Send to Zapier webhook with timeout and error handling."""
     try:
-        response = requests.post(webhook_url, json=data, timeout=10)
+        response = http_client.post("zapier", webhook_url, json=data)
         return response.status_code == 200, response.status_code
     except Exception as e:
         return False, str(e)
@@ -1347,6 +1360,7 @@ def main():
     tab_selection = st.session_state.current_tab
     contamination = 0.02
     forecast_model = 'gradient_boosting'
+    model_backend = 'exact'
     zapier_url = ""
     
     with st.sidebar:
@@ -1399,6 +1413,9 @@ def main():
                                           ['gradient_boosting', 'random_forest', 'linear_regression'],
                                           help="Gradient Boosting: Most accurate\nRandom Forest: Good balance\nLinear: Fastest")
             
+            model_backend = st.selectbox("Model Backend", list(model_factory.BACKENDS),
+                                         help="Exact: original learners\nHist: histogram-based, multithreaded; much faster on large files")
+            
             st.markdown("---")
             
             st.markdown('<h3 style="color: #fbbf24; font-weight: 700; font-size: 0.85rem; margin: 1.5rem 0 1rem 0; letter-spacing: 1.5px; text-transform: uppercase; text-align: center;">🔗 ZAPIER</h3>', unsafe_allow_html=True)
@@ -1684,9 +1701,27 @@ def main():
         
         st.markdown('<h3 class="section-header">📈 Energy Production Over Time</h3>', unsafe_allow_html=True)
         
+        chart_df = df
+        if 'TIME_STAMP' in df.columns and len(df) > MAX_CHART_POINTS:
+            first_ts = pd.to_datetime(df['TIME_STAMP'].min()).to_pydatetime()
+            last_ts = pd.to_datetime(df['TIME_STAMP'].max()).to_pydatetime()
+            if first_ts < last_ts:
+                # Narrowing the window re-samples it at full resolution up to
+                # the point budget, so detail appears as you zoom in.
+                zoom_start, zoom_end = st.slider(
+                    "Time window",
+                    min_value=first_ts,
+                    max_value=last_ts,
+                    value=(first_ts, last_ts),
+                    format="YYYY-MM-DD HH:mm",
+                    key="power_zoom"
+                )
+                chart_df = df[df['TIME_STAMP'].between(zoom_start, zoom_end)]
+        
         fig = go.Figure()
         
-        normal_data = df[~df['anomaly']]
+        normal_data = chart_df[~chart_df['anomaly']]
+        normal_data = downsample_frame(normal_data, 'TIME_STAMP', 'Value')
         fig.add_trace(go.Scatter(
             x=normal_data['TIME_STAMP'],
             y=normal_data['Value'],
@@ -1696,7 +1731,8 @@ def main():
             hovertemplate='<b>Time:</b> %{x}<br><b>Power:</b> %{y:.2f} kW<extra></extra>'
         ))
         
-        anomaly_data = df[df['anomaly']]
+        # Anomaly markers are never downsampled.
+        anomaly_data = chart_df[chart_df['anomaly']]
         if not anomaly_data.empty:
             fig.add_trace(go.Scatter(
                 x=anomaly_data['TIME_STAMP'],
@@ -1791,15 +1827,17 @@ def main():
             st.markdown('<h3 class="section-header">⚡ Efficiency Anomalies by Inverter</h3>', unsafe_allow_html=True)
             
             with st.spinner("Analyzing efficiency anomalies across all inverters..."):
-                eff_fig = detect_efficiency_anomalies(df, contamination)
+                eff_results = detect_efficiency_anomalies(df, contamination)
             
-            if eff_fig:
-                st.plotly_chart(eff_fig, use_container_width=True)
+            if eff_results is not None and not eff_results.empty:
+                inverter_list = list(eff_results['SOURCE_ID'].cat.categories)
+                selected_inverter = st.selectbox("Inverter", inverter_list, key="eff_inverter")
+                st.plotly_chart(build_efficiency_figure(eff_results, selected_inverter), use_container_width=True)
                 
                 st.markdown("""
                 <div class="info-box">
                     <h4 style="color: white;">📊 How to Use This Chart</h4>
-                    <p style="color: white; font-size: 1.05rem;">Use the dropdown menu in the top-right corner to switch between different inverters. 
+                    <p style="color: white; font-size: 1.05rem;">Use the inverter selector above the chart to switch between different inverters. 
                     The <strong>blue line</strong> shows efficiency over time, and <strong>red X marks</strong> indicate detected anomalies. 
                     Hover over data points for detailed information.</p>
                 </div>
@@ -2099,7 +2137,7 @@ def main():
         
         with progress_container:
             with st.spinner(f"🤖 Training {forecast_model.replace('_', ' ').title()} model on your data..."):
-                forecast_df, metrics, error = run_forecast(df, model_type=forecast_model)
+                forecast_df, metrics, error = run_forecast(df, model_type=forecast_model, backend=model_backend)
         
         progress_container.empty()
         
@@ -2182,11 +2220,14 @@ def main():
             
             st.markdown('<h3 class="section-header">📊 Forecast vs Actual Comparison</h3>', unsafe_allow_html=True)
             
+            actual_plot = downsample_frame(forecast_df, 'Index', 'Actual')
+            predicted_plot = downsample_frame(forecast_df, 'Index', 'Predicted')
+            
             fig_forecast = go.Figure()
             
             fig_forecast.add_trace(go.Scatter(
-                x=forecast_df['Index'],
-                y=forecast_df['Actual'],
+                x=actual_plot['Index'],
+                y=actual_plot['Actual'],
                 mode='lines',
                 name='Actual Values',
                 line=dict(color='#3b82f6', width=2),
@@ -2194,8 +2235,8 @@ def main():
             ))
             
             fig_forecast.add_trace(go.Scatter(
-                x=forecast_df['Index'],
-                y=forecast_df['Predicted'],
+                x=predicted_plot['Index'],
+                y=predicted_plot['Predicted'],
                 mode='lines',
                 name='Predicted Values',
                 line=dict(color='#fbbf24', width=2, dash='dash'),
@@ -2220,10 +2261,11 @@ def main():
             col1, col2 = st.columns(2)
             
             with col1:
+                error_plot = downsample_frame(forecast_df, 'Index', 'Error')
                 fig_error = go.Figure()
                 fig_error.add_trace(go.Scatter(
-                    x=forecast_df['Index'],
-                    y=forecast_df['Error'],
+                    x=error_plot['Index'],
+                    y=error_plot['Error'],
                     mode='lines',
                     name='Absolute Error',
                     fill='tozeroy',
@@ -2242,10 +2284,11 @@ def main():
                 st.plotly_chart(fig_error, use_container_width=True)
             
             with col2:
+                pct_error_plot = downsample_frame(forecast_df, 'Index', 'Percent_Error')
                 fig_pct_error = go.Figure()
                 fig_pct_error.add_trace(go.Scatter(
-                    x=forecast_df['Index'],
-                    y=forecast_df['Percent_Error'],
+                    x=pct_error_plot['Index'],
+                    y=pct_error_plot['Percent_Error'],
                     mode='lines',
                     name='Percent Error',
                     fill='tozeroy',